@@ -0,0 +1,144 @@
+from analysis import SentimentTally, SENTIMENT_LABELS
+from scrape_cache import review_hash
+from sqlite_store import SQLiteConnection
+import threading
+import sqlite3
+import time
+import os
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS scored_reviews ("
+    "asin TEXT, review_hash TEXT, rating INTEGER NOT NULL, confidence REAL NOT NULL, scored_at REAL NOT NULL, "
+    "PRIMARY KEY (asin, review_hash))",
+    "CREATE TABLE IF NOT EXISTS aggregates ("
+    "asin TEXT PRIMARY KEY, count_1 INTEGER NOT NULL, count_2 INTEGER NOT NULL, count_3 INTEGER NOT NULL, "
+    "count_4 INTEGER NOT NULL, count_5 INTEGER NOT NULL, total_confidence REAL NOT NULL, "
+    "first_seen REAL NOT NULL, updated_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS rating_history ("
+    "asin TEXT, day TEXT, rating INTEGER, count INTEGER NOT NULL, PRIMARY KEY (asin, day, rating))"
+)
+
+
+class SentimentAggregateStore:
+    """
+    SQLite store of scored reviews and running sentiment aggregates per ASIN.
+
+    Each confident prediction is recorded once per ASIN; merging a review that
+    was already stored is a no-op. Aggregates (rating counts and the confidence
+    sum) and a per-day rating histogram are updated incrementally, so a
+    product's summary is a single-row lookup.
+    """
+
+    def __init__(self, db_path="aggregates.sqlite3"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._db = SQLiteConnection(db_path, SCHEMA)
+
+    def merge(self, asin, scored):
+        """
+        Merge (review_text, rating, confidence) predictions into the ASIN's aggregates
+        Reviews already stored for the ASIN are skipped; returns how many were new.
+        The ASIN is recorded as analyzed even when nothing is merged, so its summary
+        exists with zero counts.
+        """
+        now = time.time()
+        day = time.strftime("%Y-%m-%d", time.gmtime(now))
+        counts = {rating: 0 for rating in SENTIMENT_LABELS}
+        total_confidence = 0.0
+
+        with self._lock:
+            db = self._db.connect()
+            try:
+                for review_text, rating, confidence in scored:
+                    inserted = db.execute(
+                        "INSERT OR IGNORE INTO scored_reviews VALUES (?, ?, ?, ?, ?)",
+                        (asin, review_hash(review_text), int(rating), float(confidence), now)
+                    ).rowcount
+                    if inserted:
+                        counts[int(rating)] += 1
+                        total_confidence += float(confidence)
+
+                merged = sum(counts.values())
+                db.execute(
+                    "INSERT INTO aggregates VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(asin) DO UPDATE SET "
+                    "count_1 = count_1 + excluded.count_1, count_2 = count_2 + excluded.count_2, "
+                    "count_3 = count_3 + excluded.count_3, count_4 = count_4 + excluded.count_4, "
+                    "count_5 = count_5 + excluded.count_5, "
+                    "total_confidence = total_confidence + excluded.total_confidence, "
+                    "updated_at = excluded.updated_at",
+                    (asin, counts[1], counts[2], counts[3], counts[4], counts[5], total_confidence, now, now)
+                )
+                if merged:
+                    db.executemany(
+                        "INSERT INTO rating_history VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(asin, day, rating) DO UPDATE SET count = count + excluded.count",
+                        [(asin, day, rating, count) for rating, count in counts.items() if count]
+                    )
+                db.commit()
+            except sqlite3.Error:
+                db.rollback()
+                raise
+        return merged
+
+    def _summarize(self, row):
+        asin, *counts, total_confidence, first_seen, updated_at = row
+        tally = SentimentTally()
+        tally.sentiment_counts = dict(zip(sorted(SENTIMENT_LABELS), counts))
+        tally.total_confidence = total_confidence
+        tally.processed_reviews = sum(counts)
+        return {
+            "asin": asin,
+            "sentiment_summary": tally.summary(),
+            "processed_reviews": tally.processed_reviews,
+            "first_seen": first_seen,
+            "updated_at": updated_at
+        }
+
+    def summary(self, asin):
+        """Return the ASIN's current summary, or None if it has never been analyzed."""
+        with self._lock:
+            row = self._db.connect().execute("SELECT * FROM aggregates WHERE asin = ?", (asin,)).fetchone()
+        return self._summarize(row) if row else None
+
+    def summaries(self, asins=None, limit=100, offset=0):
+        """Return summaries for the given ASINs, or for every tracked ASIN most recently updated first."""
+        with self._lock:
+            db = self._db.connect()
+            if asins:
+                rows = db.execute(
+                    f"SELECT * FROM aggregates WHERE asin IN ({','.join('?' * len(asins))})", list(asins)
+                ).fetchall()
+            else:
+                rows = db.execute(
+                    "SELECT * FROM aggregates ORDER BY updated_at DESC LIMIT ? OFFSET ?", (limit, offset)
+                ).fetchall()
+        return [self._summarize(row) for row in rows]
+
+    def history(self, asin, since_day=None):
+        """Return the ASIN's per-day counts of newly scored reviews by rating label, oldest first."""
+        with self._lock:
+            rows = self._db.connect().execute(
+                "SELECT day, rating, count FROM rating_history WHERE asin = ? AND day >= ? ORDER BY day",
+                (asin, since_day or "")
+            ).fetchall()
+
+        history = {}
+        for day, rating, count in rows:
+            entry = history.setdefault(day, {"day": day, **{label: 0 for label in SENTIMENT_LABELS.values()}})
+            entry[SENTIMENT_LABELS[rating]] = count
+        return list(history.values())
+
+
+_aggregate_store = None
+_aggregate_store_lock = threading.Lock()
+
+
+def get_aggregate_store():
+    """Return the shared aggregate store, configured from the environment."""
+    global _aggregate_store
+
+    with _aggregate_store_lock:
+        if _aggregate_store is None:
+            _aggregate_store = SentimentAggregateStore(os.getenv("AGGREGATE_DB_PATH", "aggregates.sqlite3"))
+        return _aggregate_store
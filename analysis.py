@@ -0,0 +1,158 @@
+import math
+import time
+
+# Two-sided 95% normal quantile for confidence intervals.
+Z_95 = 1.959964
+
+SENTIMENT_LABELS = {
+    1: "very_negative",
+    2: "negative",
+    3: "neutral",
+    4: "positive",
+    5: "very_positive"
+}
+
+class SentimentTally:
+    """Running sentiment counts and averages over analyzed reviews."""
+
+    def __init__(self):
+        self.sentiment_counts = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
+        self.total_confidence = 0
+        self.processed_reviews = 0
+
+    def add(self, rating, confidence):
+        """Count one confident prediction."""
+        self.sentiment_counts[rating] += 1
+        self.total_confidence += confidence
+        self.processed_reviews += 1
+
+    def summary(self, estimated=False, sampled_fraction=None):
+        """
+        Build the sentiment_summary block of the /analyze response.
+        With estimated=True the tally is a sample, and 95% confidence intervals for
+        the average rating and the rating shares are added. sampled_fraction, if
+        known, applies the finite population correction.
+        """
+        if self.processed_reviews > 0:
+            avg_confidence = self.total_confidence / self.processed_reviews
+            avg_rating = sum(k * v for k, v in self.sentiment_counts.items()) / self.processed_reviews
+        else:
+            avg_confidence = 0
+            avg_rating = 0
+
+        summary = {label: self.sentiment_counts[rating] for rating, label in SENTIMENT_LABELS.items()}
+        summary["average_rating"] = float(avg_rating)
+        summary["average_confidence"] = float(avg_confidence)
+        summary["estimated"] = estimated
+        if estimated:
+            summary.update(self.confidence_intervals(avg_rating, sampled_fraction))
+        return summary
+
+    def confidence_intervals(self, avg_rating, sampled_fraction=None):
+        """95% intervals for the average rating (normal) and each rating share (Wilson)."""
+        n = self.processed_reviews
+        if n == 0:
+            return {"confidence_level": 0.95, "average_rating_ci": None, "shares": None, "share_ci": None}
+
+        # Finite population correction: sampling a known fraction f of all reviews
+        # has the variance of an unrestricted sample of n / (1 - f).
+        if sampled_fraction is not None and sampled_fraction >= 1:
+            n_effective = math.inf
+        else:
+            n_effective = n / (1.0 - sampled_fraction) if sampled_fraction is not None else n
+
+        variance = (sum(count * (rating - avg_rating) ** 2 for rating, count in self.sentiment_counts.items()) / (n - 1)
+                    if n > 1 else 0.0)
+        half_width = Z_95 * math.sqrt(variance / n_effective)
+
+        shares, share_ci = {}, {}
+        z2_n = Z_95 ** 2 / n_effective
+        for rating, label in SENTIMENT_LABELS.items():
+            p = self.sentiment_counts[rating] / n
+            center = (p + z2_n / 2) / (1 + z2_n)
+            spread = Z_95 * math.sqrt(p * (1 - p) / n_effective + z2_n / (4 * n_effective)) / (1 + z2_n)
+            shares[label] = p
+            share_ci[label] = [max(0.0, center - spread), min(1.0, center + spread)]
+
+        return {
+            "confidence_level": 0.95,
+            "average_rating_ci": [max(1.0, avg_rating - half_width), min(5.0, avg_rating + half_width)],
+            "shares": shares,
+            "share_ci": share_ci
+        }
+
+
+class AnalysisBudget:
+    """
+    Latency and size budget for one analysis.
+
+    deadline_ms bounds the wall-clock time and max_reviews the number of reviews
+    scored. Per-page quotas spread what is left of either budget evenly over the
+    remaining pages, so the scored reviews form a per-page random sample.
+    """
+
+    # Fraction of the deadline kept back for building and sending the response.
+    RESERVE = 0.1
+    # Assumed scoring cost per review until the first page has been timed.
+    INITIAL_SECONDS_PER_REVIEW = 0.05
+
+    def __init__(self, deadline_ms=None, max_reviews=None):
+        self.deadline_ms = deadline_ms
+        self.max_reviews = max_reviews
+        self.started_at = time.monotonic()
+        self.deadline = (self.started_at + deadline_ms / 1000.0 * (1 - self.RESERVE)
+                         if deadline_ms is not None else None)
+        self.scored = 0
+        self.skipped = 0
+        self._scoring_seconds = 0.0
+
+    @property
+    def active(self):
+        return self.deadline_ms is not None or self.max_reviews is not None
+
+    def remaining(self):
+        """Seconds left before the deadline, or None without one."""
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def expired(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def quota(self, page_size, pages_left):
+        """How many of a page's page_size reviews to score."""
+        pages_left = max(1, pages_left)
+        quota = page_size
+        if self.max_reviews is not None:
+            quota = min(quota, math.ceil(max(0, self.max_reviews - self.scored) / pages_left))
+        if self.deadline is not None:
+            seconds_per_review = (self._scoring_seconds / self.scored if self.scored
+                                  else self.INITIAL_SECONDS_PER_REVIEW)
+            if seconds_per_review > 0:
+                quota = min(quota, int(max(0.0, self.remaining()) / pages_left / seconds_per_review))
+        return max(0, quota)
+
+    def record(self, scored, skipped, seconds):
+        """Account for one page: reviews scored, reviews left out of the sample and time spent scoring."""
+        self.scored += scored
+        self.skipped += skipped
+        self._scoring_seconds += seconds
+
+    def report(self, stopped_early):
+        """The budget block of the /analyze response."""
+        return {
+            "deadline_ms": self.deadline_ms,
+            "max_reviews": self.max_reviews,
+            "elapsed_ms": (time.monotonic() - self.started_at) * 1000,
+            "scored_reviews": self.scored,
+            "sampled_out_reviews": self.skipped,
+            "stopped_early": stopped_early
+        }
+
+
+def format_review(review_text, rating, confidence, probabilities):
+    """Build one analyzed_reviews entry of the /analyze response."""
+    return {
+        "review_text": review_text[:500],  # Limit review text length in response.
+        "predicted_rating": int(rating),
+        "confidence": float(confidence),
+        "probabilities": [float(p) for p in probabilities] if probabilities is not None else None
+    }
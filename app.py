@@ -1,8 +1,26 @@
-from flask import Flask, request, jsonify, render_template
-from sentiment_model import SentimentAnalyzer
+from flask import Flask, Response, g, request, jsonify, render_template, stream_with_context
+from sentiment_model import SentimentAnalyzer, LazySentimentAnalyzer
+from inference_scheduler import InferenceScheduler
+from prediction_cache import PredictionCache
+from cascade_model import FastSentimentClassifier
+from analysis import AnalysisBudget, SentimentTally, format_review
+from jobs import JobManager, QueueFullError
+from dedup import ReviewDeduplicator
+from aggregate_store import get_aggregate_store
+from scrape_cache import product_key
+from response_format import InvalidFormatError, encode_response, response_options, select_fields, shape_result
 from flask_cors import CORS
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import metrics
 import logging
-from scrape import scrape_amazon_reviews
+import json
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+from scrape import iter_review_pages, warm_scrapers
 
 # Set up logging.
 logging.basicConfig(level=logging.INFO)
@@ -11,112 +29,561 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)
 
-# Load sentiment analysis model.
-try:
-    analyzer = SentimentAnalyzer()
+def build_analyzer():
+    """Load the sentiment analysis model and run a warmup prediction."""
+    model_path = os.getenv("SENTIMENT_MODEL_PATH", "./sentiment_model_finetuned")
+    backend = os.getenv("SENTIMENT_BACKEND", "pytorch")
+    long_text = os.getenv("LONG_TEXT_STRATEGY", "truncate")
+    max_chunks = int(os.getenv("LONG_TEXT_MAX_CHUNKS", "4"))
+    # Long-text strategies score long reviews differently, so they get their own
+    # cache entries; sliding scores also depend on how many windows are used.
+    if long_text == "truncate":
+        variant = backend
+    elif long_text == "sliding":
+        variant = f"{backend}:{long_text}:{max_chunks}"
+    else:
+        variant = f"{backend}:{long_text}"
+    # Optional cheap first stage; only reviews it is unsure about reach BERT.
+    cascade_path = os.getenv("CASCADE_MODEL_PATH")
+    analyzer = SentimentAnalyzer(
+        model_path,
+        cache=PredictionCache(
+            model_path,
+            max_memory_bytes=int(float(os.getenv("PREDICTION_CACHE_MEMORY_MB", "16")) * 2 ** 20),
+            variant=variant
+        ),
+        backend=backend,
+        cascade=FastSentimentClassifier.load(cascade_path) if cascade_path else None,
+        cascade_threshold=float(os.getenv("CASCADE_THRESHOLD", "0.9")),
+        long_text=long_text,
+        max_chunks=max_chunks
+    )
     # Test the model.
     sample_review = "This product is amazing! The quality exceeded my expectations."
     rating, confidence, probabilities = analyzer.predict(sample_review)
     logger.info(f"Model test - Rating: {rating}/5, Confidence: {confidence:.2f}")
-except Exception as e:
-    logger.error(f"Error loading model: {str(e)}")
-    raise
+    return analyzer
+
+# The model is loaded on first use or by analyzer.start() (see __main__ and
+# serve.py), so importing this module stays cheap.
+analyzer = LazySentimentAnalyzer(build_analyzer)
+
+# Merge texts from concurrent requests into shared inference batches.
+scheduler = InferenceScheduler(analyzer, result_timeout=float(os.getenv("INFERENCE_RESULT_TIMEOUT", "120")))
+
+# Bound concurrent inference per worker process (see serve.py).
+inference_slots = threading.BoundedSemaphore(int(os.getenv("MAX_INFLIGHT_INFERENCE", "4")))
+INFERENCE_SLOT_TIMEOUT = float(os.getenv("INFERENCE_SLOT_TIMEOUT", "30"))
+
+metrics.REGISTRY.register(metrics.Gauge(
+    "review_analyzer_scheduler_queue_depth", "Texts waiting for an inference batch",
+    lambda: scheduler.stats()["queue_depth"]
+))
+metrics.REGISTRY.register(metrics.Gauge(
+    "review_analyzer_model_ready", "1 once the sentiment model is loaded", lambda: int(analyzer.ready)
+))
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Count every request and its latency by endpoint."""
+    endpoint = request.endpoint or "unknown"
+    metrics.REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    if "request_start" in g:
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - g.request_start, endpoint=endpoint)
+    return response
+
+@app.route("/health")
+def health():
+    """Liveness: the process is up and serving HTTP, whether or not the model is loaded."""
+    return jsonify({"status": "ok", "model": analyzer.status()})
+
+@app.route("/ready")
+def ready():
+    """Readiness: 200 once the model is loaded, 503 (and loading started) until then."""
+    if not analyzer.ready:
+        analyzer.start()
+        return jsonify({"status": "not_ready", "model": analyzer.status()}), 503
+    return jsonify({"status": "ready", "model": "ready", "load_seconds": analyzer.load_seconds})
 
 @app.route("/")
 def index():
     """Render the homepage."""
     return render_template("index.html")
 
+class InferenceBusyError(Exception):
+    """Raised when this worker has no free inference slot or inference timed out."""
+
+
+def score_reviews(review_texts):
+    """Score texts through the shared scheduler, bounded by the per-worker in-flight limit."""
+    if not inference_slots.acquire(timeout=INFERENCE_SLOT_TIMEOUT):
+        metrics.ERRORS.inc(stage="inference_busy")
+        raise InferenceBusyError("Server busy, please retry")
+    try:
+        return scheduler.submit(review_texts)
+    except FutureTimeoutError:
+        metrics.ERRORS.inc(stage="inference_timeout")
+        raise InferenceBusyError("Inference timed out, please retry")
+    finally:
+        inference_slots.release()
+
+
+def new_deduplicator():
+    """Per-request duplicate collapsing, or None when disabled with DEDUP_ENABLED=0."""
+    if os.getenv("DEDUP_ENABLED", "1") == "0":
+        return None
+    return ReviewDeduplicator(threshold=float(os.getenv("DEDUP_THRESHOLD", "0.9")))
+
+
+def merge_into_aggregates(asin, scored):
+    """Merge confident (text, rating, confidence) predictions into the product's stored aggregates."""
+    try:
+        get_aggregate_store().merge(asin, scored)
+    except sqlite3.Error as e:
+        # The per-request result doesn't depend on the store, so don't fail the analysis.
+        logger.error(f"Error updating aggregates for {asin}: {str(e)}")
+        metrics.ERRORS.inc(stage="aggregate_store")
+
+
+def analyze_texts(review_texts, tally, dedup=None, asin=None):
+    """
+    Score review texts, count confident predictions in tally and return analyzed_reviews entries.
+    With a ReviewDeduplicator, duplicates reuse their representative's score but are still counted.
+    With an asin, confident predictions not seen before are merged into the product's aggregates.
+    """
+    review_texts = [text for text in review_texts if text and isinstance(text, str)]
+    analyzed_reviews = []
+    scored = []
+
+    with metrics.span("inference"):
+        scores = dedup.score(review_texts, score_reviews) if dedup is not None else score_reviews(review_texts)
+
+    for review_text, (rating, confidence, probabilities) in zip(review_texts, scores):
+        if rating is not None:  # Only count confident predictions.
+            tally.add(rating, confidence)
+            analyzed_reviews.append(format_review(review_text, rating, confidence, probabilities))
+            scored.append((review_text, rating, confidence))
+
+    if asin:
+        merge_into_aggregates(asin, scored)
+
+    metrics.REVIEWS.inc(len(analyzed_reviews), outcome="confident")
+    metrics.REVIEWS.inc(len(review_texts) - len(analyzed_reviews), outcome="low_confidence")
+    return analyzed_reviews
+
+
+def request_body():
+    """Return the JSON request body, {} if there is none; raises TypeError unless it is an object."""
+    data = request.get_json(silent=True)
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise TypeError("Request body must be a JSON object")
+    return data
+
+
+def parse_analyze_request():
+    """Read url, num_pages and the incremental flag from the request body."""
+    data = request_body()
+    logger.info(f"Received request data: {data}")
+    return data.get("url"), int(data.get("num_pages", 1)), bool(data.get("incremental", False))
+
+
+def parse_budget():
+    """Read the optional deadline_ms and max_reviews budget from the request body."""
+    data = request_body()
+    deadline_ms = data.get("deadline_ms")
+    max_reviews = data.get("max_reviews")
+    budget = AnalysisBudget(
+        deadline_ms=float(deadline_ms) if deadline_ms is not None else None,
+        max_reviews=int(max_reviews) if max_reviews is not None else None
+    )
+    if (budget.deadline_ms is not None and budget.deadline_ms <= 0) or (
+            budget.max_reviews is not None and budget.max_reviews < 1):
+        raise ValueError("deadline_ms and max_reviews must be positive")
+    return budget
+
+
+def request_format_options():
+    """Read response options (fields, layout, cursor, limit) from the query string and JSON body."""
+    return response_options({**request.args.to_dict(), **request_body()})
+
+
+def wants_timings():
+    """Whether the client asked for a per-stage timing breakdown (?timings=1 or "timings": true)."""
+    if request.args.get("timings") in ("1", "true"):
+        return True
+    return bool(request_body().get("timings", False))
+
+
+class NoReviewsError(Exception):
+    """Raised when scraping returned no reviews."""
+
+
+class DeadlineExceededError(Exception):
+    """Raised when the deadline passes while waiting for the next page."""
+
+
+def run_analysis(product_url, num_pages, incremental=False, tally=None, progress=None, budget=None):
+    """
+    Scrape and score a product's reviews page by page; returns the /analyze response body.
+    progress, if given, is called after each page with the page's analyzed reviews
+    and the running totals.
+    With an AnalysisBudget, pages are scored as a random sample when the budget
+    can't cover every review, and scraping stops at the deadline; the summary is
+    then marked as estimated and carries confidence intervals.
+    """
+    tally = SentimentTally() if tally is None else tally
+    budget = AnalysisBudget() if budget is None else budget
+    dedup = new_deduplicator()
+    asin, _ = product_key(product_url)
+    # Seeded per product so repeated budgeted requests sample the same reviews.
+    sampler = random.Random(product_url)
+    analyzed_reviews = []
+    total_reviews = 0
+    # Whether the budget cut the run short, as opposed to the listing running out of pages.
+    stopped_early = False
+
+    logger.info(f"Scraping {num_pages} pages of reviews from {product_url}")
+    if budget.deadline is not None:
+        # Scrape on a background thread so waiting for a page can't outlast the deadline.
+        pages = scrape_in_background(product_url, num_pages, incremental, deadline=budget.deadline)
+    else:
+        pages = iter_review_pages(product_url, num_pages, incremental=incremental)
+    try:
+        for page, page_reviews in metrics.timed_iter(pages, "scrape_wait"):
+            total_reviews += len(page_reviews)
+
+            quota = budget.quota(len(page_reviews), pages_left=num_pages - page + 1)
+            to_score = page_reviews if quota >= len(page_reviews) else sampler.sample(page_reviews, quota)
+
+            # Score each page through the shared micro-batching scheduler as it arrives.
+            start = time.perf_counter()
+            page_analyzed = analyze_texts(to_score, tally, dedup, asin)
+            budget.record(len(to_score), len(page_reviews) - len(to_score), time.perf_counter() - start)
+            analyzed_reviews.extend(page_analyzed)
+
+            if progress is not None:
+                progress(
+                    page_analyzed,
+                    pages_scraped=page,
+                    total_reviews=total_reviews,
+                    processed_reviews=tally.processed_reviews,
+                    sentiment_summary=tally.summary()
+                )
+
+            if budget.expired():
+                # Only cut short if the listing had more pages; the deadline has passed, so this doesn't wait.
+                stopped_early = page < num_pages and next(pages, None) is not None
+                break
+    except DeadlineExceededError:
+        logger.info("Deadline reached while waiting for the next page")
+        stopped_early = True
+
+    if total_reviews == 0 and not stopped_early:
+        raise NoReviewsError("No reviews found or scraping failed")
+
+    estimated = stopped_early or budget.skipped > 0
+    # The population is only known when every page was scraped.
+    sampled_fraction = None if stopped_early or not total_reviews else budget.scored / total_reviews
+
+    logger.info(f"Successfully analyzed {tally.processed_reviews} of {total_reviews} reviews")
+    result = {
+        "sentiment_summary": tally.summary(estimated=estimated, sampled_fraction=sampled_fraction),
+        "analyzed_reviews": analyzed_reviews,
+        "total_reviews": total_reviews,
+        "processed_reviews": tally.processed_reviews
+    }
+    if budget.active:
+        result["partial"] = estimated
+        result["budget"] = budget.report(stopped_early)
+    if dedup is not None:
+        result["dedup"] = dedup.stats()
+        logger.info(f"Scored {result['dedup']['scored']} of {result['dedup']['reviews']} reviews after collapsing "
+                    f"duplicates ({result['dedup']['compute_saved']:.0%} compute saved)")
+    return result
+
+
 @app.route("/analyze", methods=["POST"])
 def analyze_reviews():
     """Analyze reviews from an Amazon product URL."""
     logger.info("Analyze endpoint hit")
     
     # Initialize variables.
-    sentiment_counts = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-    analyzed_reviews = []
-    total_confidence = 0
-    processed_reviews = 0
+    tally = SentimentTally()
+    start = time.perf_counter()
     
     try:
-        data = request.json
-        logger.info(f"Received request data: {data}")
-
-        product_url = data.get("url")
-        num_pages = int(data.get("num_pages", 1))
-        
-        if not product_url:
-            return jsonify({"error": "Product URL is required"}), 400
-
-        # Scrape reviews.
-        logger.info(f"Scraping {num_pages} pages of reviews from {product_url}")
-        reviews_data = scrape_amazon_reviews(product_url, num_pages)
-        
-        if not reviews_data:
-            logger.warning("No reviews found or scraping failed")
-            return jsonify({"error": "No reviews found or scraping failed"}), 400
-
-        logger.info(f"Processing {len(reviews_data)} reviews")
-
-        # Process each review.
-        for review_text in reviews_data:
-            if not review_text or not isinstance(review_text, str):
-                continue
+        product_url, num_pages, incremental = parse_analyze_request()
+        options = request_format_options()
+        budget = parse_budget()
+    except InvalidFormatError as e:
+        return jsonify({"error": str(e)}), 400
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid request: {str(e)}"}), 400
 
-            # Analyze sentiment.
-            try:
-                rating, confidence, probabilities = analyzer.predict(review_text)
-                
-                if rating is not None:  # Only count confident predictions.
-                    sentiment_counts[rating] += 1
-                    total_confidence += confidence
-                    processed_reviews += 1
-                    
-                    analyzed_reviews.append({
-                        "review_text": review_text[:500],  # Limit review text length in response.
-                        "predicted_rating": int(rating),
-                        "confidence": float(confidence),
-                        "probabilities": [float(p) for p in probabilities] if probabilities is not None else None
-                    })
-            except Exception as e:
-                logger.error(f"Error analyzing review: {str(e)}")
-                continue
+    if not product_url:
+        return jsonify({"error": "Product URL is required"}), 400
+
+    try:
+        with metrics.collect_timings() as timings:
+            result = run_analysis(product_url, num_pages, incremental, tally=tally, budget=budget)
+            body = shape_result(result, **options)
+            if body.get("next_cursor"):
+                # Keep the full result so later pages can be fetched from GET /jobs/<result_id>.
+                body["result_id"] = jobs.store(result).id
+            with metrics.span("serialize"):
+                response = encode_response(body)
 
-        # Calculate statistics.
-        if processed_reviews > 0:
-            avg_confidence = total_confidence / processed_reviews
-            avg_rating = sum(k * v for k, v in sentiment_counts.items()) / processed_reviews
-        else:
-            avg_confidence = 0
-            avg_rating = 0
-
-        # Prepare response..
-        response = {
-            "sentiment_summary": {
-                "very_negative": sentiment_counts[1],
-                "negative": sentiment_counts[2],
-                "neutral": sentiment_counts[3],
-                "positive": sentiment_counts[4],
-                "very_positive": sentiment_counts[5],
-                "average_rating": float(avg_rating),
-                "average_confidence": float(avg_confidence)
-            },
-            "analyzed_reviews": analyzed_reviews,
-            "total_reviews": len(reviews_data),
-            "processed_reviews": processed_reviews
-        }
-
-        logger.info(f"Successfully analyzed {processed_reviews} reviews")
-        return jsonify(response)
+        # Optional per-request breakdown; serializing twice only happens when asked for.
+        # Stages on scraper and inference threads overlap, so they can add up to more than total.
+        if wants_timings():
+            body["timings"] = {**metrics.snapshot_timings(timings), "total": time.perf_counter() - start}
+            response = encode_response(body)
+        return response
+
+    except NoReviewsError as e:
+        logger.warning("No reviews found or scraping failed")
+        return jsonify({"error": str(e)}), 400
+
+    except InferenceBusyError as e:
+        logger.warning("Inference capacity exhausted")
+        return jsonify({"error": str(e)}), 503
 
     except Exception as e:
         logger.error(f"Error processing request: {str(e)}", exc_info=True)
+        metrics.ERRORS.inc(stage="request")
         return jsonify({
             "error": "Internal server error",
             "message": str(e),
-            "sentiment_counts": sentiment_counts,  # Include for debugging.
-            "processed_reviews": processed_reviews
+            "sentiment_counts": tally.sentiment_counts,  # Include for debugging.
+            "processed_reviews": tally.processed_reviews
         }), 500
 
+
+def run_analysis_job(job, product_url, num_pages, incremental):
+    """Job runner for POST /jobs."""
+    return run_analysis(product_url, num_pages, incremental, progress=job.report)
+
+
+# Background analyses, bounded so bursts are rejected instead of piling up.
+jobs = JobManager(
+    run_analysis_job,
+    max_workers=int(os.getenv("JOB_WORKERS", "2")),
+    max_queue=int(os.getenv("JOB_QUEUE_SIZE", "16")),
+    db_path=os.getenv("JOB_DB_PATH", "jobs.sqlite3")
+)
+
+
+@app.route("/jobs", methods=["POST"])
+def create_job():
+    """Queue an analysis and return its job id; identical in-flight requests share one job."""
+    try:
+        product_url, num_pages, incremental = parse_analyze_request()
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid request: {str(e)}"}), 400
+
+    if not product_url:
+        return jsonify({"error": "Product URL is required"}), 400
+
+    try:
+        job, deduplicated = jobs.submit((product_url, num_pages, incremental), product_url, num_pages, incremental)
+    except QueueFullError as e:
+        logger.warning("Job queue full")
+        return jsonify({"error": str(e)}), 429, {"Retry-After": "5"}
+
+    return jsonify({"job_id": job.id, "status": job.status, "deduplicated": deduplicated}), 202
+
+
+@app.route("/jobs/<job_id>")
+def get_job(job_id):
+    """
+    Return a job's status, progress and, once done, its result; ?since=N also returns reviews after the first N.
+    fields, layout, cursor and limit shape the result as for /analyze; ?fields= returns only the summary.
+    """
+    try:
+        options = response_options(request.args)
+    except InvalidFormatError as e:
+        return jsonify({"error": str(e)}), 400
+
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    data = job.to_dict(since=request.args.get("since", type=int))
+    if data.get("result") is not None:
+        data["result"] = shape_result(data["result"], **options)
+    if "new_results" in data and options["fields"] is not None:
+        data["new_results"] = select_fields(data["new_results"], options["fields"]) if options["fields"] else []
+    return encode_response(data)
+
+
+def scrape_in_background(product_url, num_pages, incremental=False, deadline=None):
+    """
+    Scrape pages on a background thread so scraping overlaps with inference; yields (page, reviews).
+    With a deadline (time.monotonic() value), raises DeadlineExceededError if it
+    passes while waiting for a page.
+    """
+    pages = queue.Queue(maxsize=2)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        # Give up if the consumer went away (e.g. the client disconnected).
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        page_iter = iter_review_pages(product_url, num_pages, incremental=incremental)
+        try:
+            for item in page_iter:
+                if not put(item):
+                    break
+        except Exception as e:
+            put(e)
+        finally:
+            page_iter.close()  # Quits the browser.
+            put(done)
+
+    threading.Thread(target=metrics.propagate(produce), name="scrape-producer", daemon=True).start()
+
+    try:
+        while True:
+            try:
+                item = pages.get(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                raise DeadlineExceededError("Deadline reached while waiting for the next page")
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def ndjson(event):
+    """Serialize one streamed event as a line of NDJSON."""
+    return json.dumps(event) + "\n"
+
+
+@app.route("/analyze/stream", methods=["POST"])
+def analyze_reviews_stream():
+    """Analyze reviews page by page, streaming results as NDJSON while later pages are scraped."""
+    logger.info("Analyze stream endpoint hit")
+
+    try:
+        product_url, num_pages, incremental = parse_analyze_request()
+        fields = request_format_options()["fields"]
+    except InvalidFormatError as e:
+        return jsonify({"error": str(e)}), 400
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid request: {str(e)}"}), 400
+
+    if not product_url:
+        return jsonify({"error": "Product URL is required"}), 400
+
+    def generate():
+        tally = SentimentTally()
+        dedup = new_deduplicator()
+        asin, _ = product_key(product_url)
+        total_reviews = 0
+
+        try:
+            for page, page_reviews in scrape_in_background(product_url, num_pages, incremental):
+                total_reviews += len(page_reviews)
+                page_analyzed = analyze_texts(page_reviews, tally, dedup, asin)
+                if fields != ():
+                    for review in select_fields(page_analyzed, fields):
+                        yield ndjson({"type": "review", "page": page, **review})
+
+                # Running aggregates after each page.
+                yield ndjson({
+                    "type": "summary",
+                    "page": page,
+                    "sentiment_summary": tally.summary(),
+                    "total_reviews": total_reviews,
+                    "processed_reviews": tally.processed_reviews
+                })
+
+            if total_reviews == 0:
+                logger.warning("No reviews found or scraping failed")
+                yield ndjson({"type": "error", "error": "No reviews found or scraping failed"})
+                return
+
+            logger.info(f"Successfully streamed {tally.processed_reviews} reviews")
+            done = {
+                "type": "done",
+                "sentiment_summary": tally.summary(),
+                "total_reviews": total_reviews,
+                "processed_reviews": tally.processed_reviews
+            }
+            if dedup is not None:
+                done["dedup"] = dedup.stats()
+            yield ndjson(done)
+
+        except Exception as e:
+            logger.error(f"Error streaming analysis: {str(e)}", exc_info=True)
+            metrics.ERRORS.inc(stage="request")
+            yield ndjson({"type": "error", "error": "Internal server error", "message": str(e)})
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+@app.route("/scheduler/stats")
+def scheduler_stats():
+    """Return inference queue depth and batch-size statistics."""
+    return jsonify(scheduler.stats())
+
+@app.route("/cache/stats")
+def cache_stats():
+    """Return prediction cache hit/miss counters."""
+    return jsonify(analyzer.cache.stats())
+
+@app.route("/products")
+def product_summaries():
+    """Stored summaries for ?asin=...&asin=..., or for every tracked product (?limit=, ?offset=)."""
+    summaries = get_aggregate_store().summaries(
+        asins=request.args.getlist("asin"),
+        limit=request.args.get("limit", 100, type=int),
+        offset=request.args.get("offset", 0, type=int)
+    )
+    return encode_response({"products": summaries})
+
+@app.route("/products/<asin>/summary")
+def product_summary(asin):
+    """A product's stored summary without scraping or inference; ?history=1 adds per-day rating counts."""
+    store = get_aggregate_store()
+    summary = store.summary(asin)
+    if summary is None:
+        return jsonify({"error": "Product has not been analyzed"}), 404
+    if request.args.get("history") in ("1", "true"):
+        summary["history"] = store.history(asin, since_day=request.args.get("since"))
+    return encode_response(summary)
+
+@app.route("/metrics")
+def prometheus_metrics():
+    """Return this worker's metrics in the Prometheus text format."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/cascade/stats")
+def cascade_stats():
+    """Return the fraction of reviews handled by each cascade stage."""
+    return jsonify(analyzer.cascade_stats())
+
 if __name__ == "__main__":
+    # With the debug reloader, only the serving child process needs the model and scrapers.
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        # Load the model while the server starts accepting connections.
+        analyzer.start()
+        # Prepare the scraping engine before the first request.
+        threading.Thread(target=warm_scrapers, name="scraper-warmup", daemon=True).start()
     app.run(debug=True)
\ No newline at end of file
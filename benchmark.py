@@ -0,0 +1,278 @@
+from transformers import BertConfig, BertForSequenceClassification, BertTokenizerFast
+from sentiment_model import SentimentAnalyzer, preprocess_text
+import transformers
+import torch
+import numpy as np
+import subprocess
+import statistics
+import platform
+import argparse
+import tempfile
+import logging
+import random
+import json
+import time
+import os
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BATCH_SIZES = (1, 8, 32, 64)
+
+# Review length distributions, in words: (mean of log length, spread of log length).
+LENGTH_DISTRIBUTIONS = {
+    "short": (np.log(15), 0.3),
+    "mixed": (np.log(60), 1.0),
+    "long": (np.log(300), 0.3)
+}
+
+POSITIVE_WORDS = ["great", "amazing", "excellent", "love", "perfect", "sturdy", "recommend", "happy", "best", "works"]
+NEGATIVE_WORDS = ["terrible", "broke", "awful", "disappointing", "cheap", "worst", "refund", "waste", "flimsy", "returned"]
+FILLER_WORDS = [
+    "the", "a", "this", "it", "product", "and", "was", "is", "i", "after", "for", "with", "my", "quality",
+    "price", "shipping", "box", "day", "week", "use", "battery", "size", "color", "would", "not", "really",
+    "very", "but", "so", "again", "bought", "order", "item", "arrived", "time", "money", "kids", "kitchen"
+]
+PUNCTUATION = [".", "!", "?", ",", ":)", ":("]
+
+
+def make_reviews(count, distribution, seed=0):
+    """Generate count synthetic review texts with word counts drawn from a length distribution."""
+    rng = random.Random(seed)
+    mean, spread = LENGTH_DISTRIBUTIONS[distribution]
+    reviews = []
+    for _ in range(count):
+        length = max(3, int(rng.lognormvariate(mean, spread)))
+        sentiment = rng.choice([POSITIVE_WORDS, NEGATIVE_WORDS])
+        words = [rng.choice(sentiment) if rng.random() < 0.2 else rng.choice(FILLER_WORDS) for _ in range(length)]
+        text = " ".join(words)
+        # Exercise preprocess_text: markup, repeated punctuation and contractions.
+        reviews.append(f"<p>{text.capitalize()}{rng.choice(PUNCTUATION) * rng.randint(1, 3)} Didn't expect that</p>")
+    return reviews
+
+
+def build_tiny_model(output_dir, seed=0):
+    """
+    Save a tiny randomly initialised BERT classifier and tokenizer to output_dir
+    Stands in for ./sentiment_model_finetuned so benchmarks run offline; timings
+    track code-path overhead, not the full-size model's absolute latency.
+    """
+    special_tokens = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    words = sorted(set(POSITIVE_WORDS + NEGATIVE_WORDS + FILLER_WORDS + ["didn", "not", "positive", "negative"]))
+    characters = [chr(c) for c in range(ord("a"), ord("z") + 1)] + list("0123456789.,!?:()'")
+    # Single-letter words ("a", "i") are also characters; each token must appear once.
+    vocab = list(dict.fromkeys(special_tokens + words + characters + [f"##{c}" for c in characters]))
+
+    os.makedirs(output_dir, exist_ok=True)
+    vocab_file = os.path.join(output_dir, "vocab.txt")
+    with open(vocab_file, "w") as f:
+        f.write("\n".join(vocab) + "\n")
+
+    torch.manual_seed(seed)
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=128,
+        max_position_embeddings=512,
+        num_labels=5
+    )
+    BertForSequenceClassification(config).save_pretrained(output_dir)
+    BertTokenizerFast(vocab_file=vocab_file, do_lower_case=True).save_pretrained(output_dir)
+    return output_dir
+
+
+def time_call(function, repeat=5, warmup=1, items=1):
+    """Time function() repeat times after warmup calls; returns seconds and items/sec statistics."""
+    for _ in range(warmup):
+        function()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    median = statistics.median(timings)
+    return {
+        "median_seconds": median,
+        "min_seconds": min(timings),
+        "mean_seconds": statistics.mean(timings),
+        "items": items,
+        "items_per_second": items / median if median else 0.0
+    }
+
+
+def bench_inference(model_dir, num_texts, repeat):
+    """Benchmark preprocessing, tokenization, predict and predict_batch per length distribution."""
+    analyzer = SentimentAnalyzer(model_dir)
+    results = {}
+
+    for distribution in LENGTH_DISTRIBUTIONS:
+        texts = make_reviews(num_texts, distribution)
+        processed = [preprocess_text(text) for text in texts]
+        lengths = analyzer.token_lengths(texts)
+        logger.info(f"Benchmarking {distribution} reviews (mean {np.mean(lengths):.0f} tokens)")
+
+        entry = {
+            "mean_tokens": float(np.mean(lengths)),
+            "max_tokens": int(max(lengths)),
+            "preprocess": time_call(lambda: [preprocess_text(text) for text in texts], repeat, items=len(texts)),
+            "tokenize": time_call(
+                lambda: analyzer.tokenizer(processed, truncation=True, max_length=512), repeat, items=len(texts)
+            ),
+            "predict": time_call(
+                lambda: [analyzer.predict(text) for text in texts], repeat, items=len(texts)
+            ),
+            "predict_batch": {}
+        }
+        for batch_size in BATCH_SIZES:
+            entry["predict_batch"][str(batch_size)] = time_call(
+                lambda: analyzer.predict_batch(texts, batch_size=batch_size), repeat, items=len(texts)
+            )
+        results[distribution] = entry
+
+    return results
+
+
+def bench_analyze_endpoint(model_dir, num_pages, reviews_per_page, repeat):
+    """
+    Benchmark POST /analyze end to end through the Flask test client
+    Scraping is replaced with fixture pages. "cold" requests use fresh review
+    texts each time so they miss the prediction cache; "warm" requests repeat the
+    same texts and are answered from it.
+    """
+    os.environ["SENTIMENT_MODEL_PATH"] = model_dir
+    os.environ["SENTIMENT_BACKEND"] = "pytorch"
+    os.environ.pop("CASCADE_MODEL_PATH", None)
+
+    # Cold start: importing the app must not load the model; loading is timed separately.
+    start = time.perf_counter()
+    import app as app_module
+    import_seconds = time.perf_counter() - start
+    app_module.analyzer.load()
+    import scrape
+
+    fixture = {"round": 0}
+
+    def fake_iter_review_pages(product_url, num_pages=5, incremental=False, **kwargs):
+        for page in range(1, num_pages + 1):
+            reviews = make_reviews(reviews_per_page, "mixed", seed=page)
+            yield page, [f"{text} (round {fixture['round']})" for text in reviews]
+
+    def fake_scrape_amazon_reviews(product_url, num_pages=5, incremental=False, **kwargs):
+        return [text for _, reviews in fake_iter_review_pages(product_url, num_pages) for text in reviews]
+
+    app_module.iter_review_pages = fake_iter_review_pages
+    scrape.iter_review_pages = fake_iter_review_pages
+    scrape.scrape_amazon_reviews = fake_scrape_amazon_reviews
+
+    client = app_module.app.test_client()
+    body = {"url": "https://www.amazon.com/product-reviews/B000000000", "num_pages": num_pages}
+
+    def post():
+        response = client.post("/analyze", json=body)
+        if response.status_code != 200:
+            raise RuntimeError(f"/analyze returned {response.status_code}: {response.get_data(as_text=True)}")
+
+    def post_cold():
+        fixture["round"] += 1
+        post()
+
+    items = num_pages * reviews_per_page
+    return {
+        "pages": num_pages,
+        "reviews_per_page": reviews_per_page,
+        "app_import_seconds": import_seconds,
+        "model_load_seconds": app_module.analyzer.load_seconds,
+        "cold": time_call(post_cold, repeat, items=items),
+        "warm": time_call(post, repeat, items=items)
+    }
+
+
+def environment_info():
+    """Describe the machine and code version the results were measured on."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "transformers": transformers.__version__
+    }
+
+
+def compare(results, baseline):
+    """Log the median-time change of every timing in results against a baseline results file."""
+    def timings(tree, prefix=""):
+        for key, value in tree.items():
+            if isinstance(value, dict) and "median_seconds" in value:
+                yield prefix + key, value["median_seconds"]
+            elif isinstance(value, dict):
+                yield from timings(value, f"{prefix}{key}.")
+
+    previous = dict(timings(baseline["results"]))
+    for name, seconds in timings(results["results"]):
+        if previous.get(name):
+            change = (seconds - previous[name]) / previous[name] * 100
+            logger.info(f"{name}: {previous[name] * 1000:.2f}ms -> {seconds * 1000:.2f}ms ({change:+.1f}%)")
+
+
+def run(num_texts=256, repeat=5, num_pages=3, reviews_per_page=10, threads=1):
+    """Run every benchmark against a fresh tiny model in a temporary directory."""
+    if threads:
+        torch.set_num_threads(threads)
+
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Caches and job databases the app creates land in the temporary directory.
+        os.chdir(work_dir)
+        try:
+            model_dir = build_tiny_model(os.path.join(work_dir, "tiny_model"))
+            return {
+                "environment": environment_info(),
+                "config": {
+                    "num_texts": num_texts,
+                    "repeat": repeat,
+                    "batch_sizes": list(BATCH_SIZES),
+                    "num_pages": num_pages,
+                    "reviews_per_page": reviews_per_page
+                },
+                "results": {
+                    "inference": bench_inference(model_dir, num_texts, repeat),
+                    "analyze_endpoint": bench_analyze_endpoint(model_dir, num_pages, reviews_per_page, repeat)
+                }
+            }
+        finally:
+            os.chdir(original_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the inference and /analyze paths")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=None, help="Earlier results file to compare against")
+    parser.add_argument("--num-texts", type=int, default=256)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--num-pages", type=int, default=3)
+    parser.add_argument("--reviews-per-page", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=1, help="Torch intra-op threads (0 keeps the default)")
+    args = parser.parse_args()
+
+    results = run(args.num_texts, args.repeat, args.num_pages, args.reviews_per_page, args.threads)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    logger.info(f"Benchmark results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
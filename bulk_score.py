@@ -0,0 +1,241 @@
+from collections import deque
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pandas as pd
+import multiprocessing
+import argparse
+import logging
+import json
+import time
+import os
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE = "_checkpoint.json"
+
+# Set in each worker process by init_worker.
+_analyzer = None
+_confidence_threshold = 0.6
+
+
+def iter_chunks(input_path, chunk_size, text_column, id_column=None):
+    """
+    Stream (texts, ids) lists of at most chunk_size rows from a CSV, JSONL or Parquet file
+    ids is None without an id column. Parquet ids are read from Arrow as is, so
+    nullable integer ids stay integers; CSV/JSONL ids are converted to strings.
+    """
+    columns = [text_column] + ([id_column] if id_column else [])
+
+    if input_path.endswith(".parquet"):
+        parquet_file = pq.ParquetFile(input_path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            ids = batch.column(id_column).to_pylist() if id_column else None
+            yield batch.column(text_column).to_pylist(), ids
+        return
+
+    if input_path.endswith((".jsonl", ".ndjson")):
+        chunks = (chunk[columns] for chunk in pd.read_json(input_path, lines=True, chunksize=chunk_size))
+    else:
+        chunks = pd.read_csv(input_path, chunksize=chunk_size, usecols=columns)
+    for chunk in chunks:
+        ids = [None if pd.isna(value) else str(value) for value in chunk[id_column].tolist()] if id_column else None
+        yield chunk[text_column].tolist(), ids
+
+
+def id_type(input_path, id_column=None):
+    """
+    Arrow type of the output id column
+    Row numbers are int64 and Parquet ids keep their type; ids read from CSV or
+    JSONL are written as strings, since each chunk's inferred dtype can differ.
+    """
+    if not id_column:
+        return pa.int64()
+    if input_path.endswith(".parquet"):
+        return pq.read_schema(input_path).field(id_column).type
+    return pa.string()
+
+
+def output_schema(ids_type):
+    """Schema shared by every part file, so parts agree even when a chunk's column is all null."""
+    return pa.schema(
+        [("id", ids_type), ("predicted_rating", pa.int64()), ("confidence", pa.float64())] +
+        [(f"prob_{star}", pa.float64()) for star in range(1, 6)]
+    )
+
+
+def init_worker(model_path, backend, threads, confidence_threshold):
+    """Load one SentimentAnalyzer per worker process."""
+    global _analyzer, _confidence_threshold
+    import torch
+    from sentiment_model import SentimentAnalyzer
+
+    torch.set_num_threads(threads)
+    _analyzer = SentimentAnalyzer(model_path, backend=backend)
+    _confidence_threshold = confidence_threshold
+
+
+def score_chunk(chunk_index, texts, ids, batch_size, schema):
+    """Score one chunk in a worker; returns (chunk_index, Arrow table with the given schema)."""
+    results = _analyzer.predict_batch(
+        [str(text) if isinstance(text, str) else "" for text in texts],
+        batch_size=batch_size,
+        confidence_threshold=_confidence_threshold
+    )
+
+    columns = {
+        "id": ids,
+        "predicted_rating": [int(rating) if rating is not None else None for rating, _, _ in results],
+        "confidence": [float(confidence) for _, confidence, _ in results]
+    }
+    for star in range(5):
+        columns[f"prob_{star + 1}"] = [float(probs[star]) if probs is not None else None for _, _, probs in results]
+    return chunk_index, pa.table(columns, schema=schema)
+
+
+def load_checkpoint(output_dir, settings):
+    """
+    Return the saved progress, or a fresh one
+    Raises ValueError if the checkpoint was written with different settings
+    (input, chunk size, model, ...), since chunk indexes would no longer line up.
+    """
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            checkpoint = json.load(f)
+        if checkpoint["completed_chunks"] and checkpoint.get("settings") != settings:
+            changed = sorted(name for name in settings
+                             if settings[name] != checkpoint.get("settings", {}).get(name))
+            raise ValueError(
+                f"Checkpoint in {output_dir} was written with different settings ({', '.join(changed)}); "
+                "resume with the original settings or use a new output directory"
+            )
+        checkpoint["settings"] = settings
+        return checkpoint
+    return {"completed_chunks": 0, "rows": 0, "settings": settings}
+
+
+def save_checkpoint(output_dir, checkpoint):
+    """Atomically persist progress."""
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(path + ".tmp", path)
+
+
+def write_part(output_dir, chunk_index, table):
+    """Atomically write one chunk's results as a Parquet part file."""
+    path = os.path.join(output_dir, f"part-{chunk_index:06d}.parquet")
+    pq.write_table(table, path + ".tmp", compression="zstd")
+    os.replace(path + ".tmp", path)
+
+
+def bulk_score(input_path, output_dir, model_path="./sentiment_model_finetuned", backend="pytorch",
+               text_column="review_text", id_column=None, chunk_size=10000, batch_size=64,
+               workers=None, threads_per_worker=None, confidence_threshold=0.6):
+    """
+    Score a large review file into Parquet part files in output_dir.
+    Chunks are streamed from the input and at most 2 * workers are held in memory;
+    progress is checkpointed after every written chunk, so a killed run resumes
+    from the last completed chunk. A run with different settings (input, chunk
+    size, model, ...) refuses to resume from the checkpoint.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    cores = os.cpu_count() or 1
+    workers = workers or max(1, cores // 4)
+    threads_per_worker = threads_per_worker or max(1, cores // workers)
+
+    # Anything that changes chunk boundaries or the scores; resuming requires all of it to match.
+    settings = {
+        "input_path": os.path.abspath(input_path),
+        "input_size": os.path.getsize(input_path),
+        "chunk_size": chunk_size,
+        "model_path": os.path.abspath(model_path),
+        "backend": backend,
+        "text_column": text_column,
+        "id_column": id_column,
+        "confidence_threshold": confidence_threshold
+    }
+    checkpoint = load_checkpoint(output_dir, settings)
+    schema = output_schema(id_type(input_path, id_column))
+    if checkpoint["completed_chunks"]:
+        logger.info(f"Resuming after chunk {checkpoint['completed_chunks']} ({checkpoint['rows']} rows done)")
+
+    pool = multiprocessing.Pool(
+        workers,
+        initializer=init_worker,
+        initargs=(model_path, backend, threads_per_worker, confidence_threshold)
+    )
+    pending = deque()
+    start_time = time.perf_counter()
+    start_rows = checkpoint["rows"]
+
+    def drain_one():
+        # Results are written in order, so the checkpoint is always a contiguous prefix.
+        chunk_index, table = pending.popleft().get()
+        write_part(output_dir, chunk_index, table)
+        checkpoint["completed_chunks"] = chunk_index + 1
+        checkpoint["rows"] += table.num_rows
+        save_checkpoint(output_dir, checkpoint)
+
+        elapsed = time.perf_counter() - start_time
+        rate = (checkpoint["rows"] - start_rows) / elapsed if elapsed else 0.0
+        logger.info(f"Chunk {chunk_index}: {checkpoint['rows']} rows scored, {rate:.1f} rows/sec")
+
+    try:
+        row_offset = 0
+        for chunk_index, (texts, ids) in enumerate(iter_chunks(input_path, chunk_size, text_column, id_column)):
+            chunk_rows = len(texts)
+            if chunk_index < checkpoint["completed_chunks"]:
+                row_offset += chunk_rows
+                continue
+
+            if ids is None:
+                ids = list(range(row_offset, row_offset + chunk_rows))
+            row_offset += chunk_rows
+
+            # Bound the chunks in flight so memory stays flat regardless of input size.
+            while len(pending) >= 2 * workers:
+                drain_one()
+            pending.append(pool.apply_async(score_chunk, (chunk_index, texts, ids, batch_size, schema)))
+
+        while pending:
+            drain_one()
+    finally:
+        pool.terminate()
+        pool.join()
+
+    elapsed = time.perf_counter() - start_time
+    scored = checkpoint["rows"] - start_rows
+    logger.info(f"Scored {scored} rows in {elapsed:.1f}s ({scored / elapsed if elapsed else 0.0:.1f} rows/sec)")
+    return checkpoint
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a large review file (CSV, JSONL or Parquet) into Parquet")
+    parser.add_argument("input", help="Input .csv, .jsonl/.ndjson or .parquet file")
+    parser.add_argument("output_dir", help="Directory for Parquet part files and the checkpoint")
+    parser.add_argument("--model-path", default="./sentiment_model_finetuned")
+    parser.add_argument("--backend", default="pytorch", choices=["pytorch", "quantized", "onnx"])
+    parser.add_argument("--text-column", default="review_text")
+    parser.add_argument("--id-column", default=None, help="Column copied to the output (default: row number)")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threads-per-worker", type=int, default=None)
+    parser.add_argument("--confidence-threshold", type=float, default=0.6)
+    args = parser.parse_args()
+
+    bulk_score(
+        args.input,
+        args.output_dir,
+        model_path=args.model_path,
+        backend=args.backend,
+        text_column=args.text_column,
+        id_column=args.id_column,
+        chunk_size=args.chunk_size,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        threads_per_worker=args.threads_per_worker,
+        confidence_threshold=args.confidence_threshold
+    )
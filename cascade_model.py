@@ -0,0 +1,143 @@
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sentiment_model import SentimentAnalyzer, preprocess_text
+import pandas as pd
+import numpy as np
+import argparse
+import joblib
+import logging
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RATINGS = np.array([1, 2, 3, 4, 5])
+
+class FastSentimentClassifier:
+    """
+    Cheap first-stage sentiment model for the SentimentAnalyzer cascade.
+
+    Hashed word uni/bigram features with a logistic-loss linear classifier.
+    Trained incrementally, so the full training CSV never has to fit in memory.
+    """
+
+    def __init__(self, n_features=2 ** 20):
+        self.n_features = n_features
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features,
+            ngram_range=(1, 2),
+            alternate_sign=False,
+            norm="l2"
+        )
+        self.classifier = SGDClassifier(loss="log_loss", alpha=1e-6, random_state=42)
+
+    def partial_fit(self, texts, ratings):
+        """Update the model with one chunk of preprocessed texts and 1-5 ratings."""
+        self.classifier.partial_fit(self.vectorizer.transform(texts), ratings, classes=RATINGS)
+
+    def predict_proba(self, texts):
+        """Return an (n, 5) float32 array of rating probabilities for preprocessed texts."""
+        probabilities = np.zeros((len(texts), len(RATINGS)), dtype=np.float32)
+        if not texts:
+            return probabilities
+        class_probabilities = self.classifier.predict_proba(self.vectorizer.transform(texts))
+        probabilities[:, self.classifier.classes_ - 1] = class_probabilities
+        return probabilities
+
+    def save(self, path):
+        """
+        Save the model state with joblib.
+        Only plain state is pickled, not this class, so a model trained by running
+        this file as a script loads wherever cascade_model is imported.
+        """
+        joblib.dump({"n_features": self.n_features, "classifier": self.classifier}, path)
+
+    @staticmethod
+    def load(path):
+        """Load a model saved with save()."""
+        state = joblib.load(path)
+        model = FastSentimentClassifier(n_features=state["n_features"])
+        model.classifier = state["classifier"]
+        return model
+
+
+def load_reviews(csv_path, chunk_size=None):
+    """Read (preprocessed texts, ratings) from a review CSV, optionally in chunks."""
+    chunks = pd.read_csv(csv_path, chunksize=chunk_size) if chunk_size else [pd.read_csv(csv_path)]
+    for chunk in chunks:
+        texts = [preprocess_text(text) for text in chunk["review_text"].fillna("").astype(str)]
+        yield texts, chunk["rating"].to_numpy()
+
+
+def train(train_path="data/amazon_reviews_train.csv", output_path="./sentiment_model_fast.joblib",
+          epochs=3, chunk_size=50000):
+    """Train the first-stage classifier from the same CSV used to fine-tune BERT."""
+    model = FastSentimentClassifier()
+    for epoch in range(epochs):
+        rows = 0
+        for texts, ratings in load_reviews(train_path, chunk_size):
+            model.partial_fit(texts, ratings)
+            rows += len(texts)
+        logger.info(f"Epoch {epoch + 1}/{epochs}: trained on {rows} reviews")
+
+    model.save(output_path)
+    logger.info(f"Fast classifier saved to {output_path}")
+    return model
+
+
+def evaluate(test_path="data/amazon_reviews_test.csv", model_path="./sentiment_model_finetuned",
+             fast_model_path="./sentiment_model_fast.joblib", thresholds=(0.7, 0.8, 0.9, 0.95)):
+    """
+    Compare the cascade against BERT-only on the test CSV
+    Reports, per cascade threshold, the fraction of reviews each stage handles and
+    the accuracy change against BERT-only.
+    """
+    texts, labels = next(load_reviews(test_path))
+    fast_model = FastSentimentClassifier.load(fast_model_path)
+    analyzer = SentimentAnalyzer(model_path)
+
+    start = time.perf_counter()
+    bert_results = analyzer.predict_batch(texts, confidence_threshold=0.0)
+    bert_seconds = time.perf_counter() - start
+    bert_ratings = np.array([rating if rating is not None else 0 for rating, _, _ in bert_results])
+
+    start = time.perf_counter()
+    fast_probabilities = fast_model.predict_proba(texts)
+    fast_seconds = time.perf_counter() - start
+    fast_ratings = fast_probabilities.argmax(axis=1) + 1
+    fast_confidence = fast_probabilities.max(axis=1)
+
+    bert_accuracy = float((bert_ratings == labels).mean())
+    logger.info(f"BERT-only accuracy: {bert_accuracy:.4f} ({bert_seconds:.1f}s)")
+    logger.info(f"Fast-only accuracy: {float((fast_ratings == labels).mean()):.4f} ({fast_seconds:.2f}s)")
+
+    report = {"bert_accuracy": bert_accuracy, "thresholds": {}}
+    for threshold in thresholds:
+        use_fast = fast_confidence >= threshold
+        cascade_ratings = np.where(use_fast, fast_ratings, bert_ratings)
+        accuracy = float((cascade_ratings == labels).mean())
+        report["thresholds"][threshold] = {
+            "fast_fraction": float(use_fast.mean()),
+            "bert_fraction": float(1 - use_fast.mean()),
+            "accuracy": accuracy,
+            "accuracy_change": accuracy - bert_accuracy,
+            "estimated_seconds": fast_seconds + bert_seconds * float(1 - use_fast.mean())
+        }
+        logger.info(f"Threshold {threshold}: {report['thresholds'][threshold]}")
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train or evaluate the cascade's fast first-stage classifier")
+    parser.add_argument("command", choices=["train", "evaluate"])
+    parser.add_argument("--train-path", default="data/amazon_reviews_train.csv")
+    parser.add_argument("--test-path", default="data/amazon_reviews_test.csv")
+    parser.add_argument("--fast-model-path", default="./sentiment_model_fast.joblib")
+    parser.add_argument("--epochs", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == "train":
+        train(args.train_path, args.fast_model_path, epochs=args.epochs)
+    else:
+        evaluate(args.test_path, fast_model_path=args.fast_model_path)
@@ -0,0 +1,126 @@
+from sentiment_model import preprocess_text
+import numpy as np
+import metrics
+import zlib
+import re
+
+# Mersenne prime for the MinHash permutations; hashes are 32-bit, so a * x + b fits in uint64.
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def shingles(text, size=3):
+    """Set of word size-grams of a text (the whole text when it is shorter than size words)."""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class ReviewDeduplicator:
+    """
+    Collapses exact and near-duplicate reviews so each cluster is scored once.
+
+    Exact duplicates are matched on the preprocessed text. Near-duplicates are
+    found with MinHash signatures over word shingles and LSH banding, and
+    confirmed with the exact Jaccard similarity of the shingle sets. State is
+    kept across calls, so duplicates on later pages reuse earlier results.
+    """
+
+    def __init__(self, threshold=0.9, num_perm=128, bands=16, shingle_size=3, seed=42):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, MAX_HASH, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, MAX_HASH, size=num_perm, dtype=np.uint64)
+
+        self._exact = {}      # Preprocessed text -> representative id.
+        self._buckets = {}    # (band, band signature) -> representative ids.
+        self._shingles = []   # Shingle set per representative.
+        self._results = []    # Score per representative.
+
+        self.reviews = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+
+    def _signature(self, shingle_set):
+        """MinHash signature of a shingle set."""
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingle_set), dtype=np.uint64,
+                             count=len(shingle_set))
+        return ((self._a[:, None] * hashes[None, :] + self._b[:, None]) % MERSENNE_PRIME).min(axis=1)
+
+    def _band_keys(self, signature):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def _find_near(self, shingle_set, band_keys):
+        """Return the representative most similar to shingle_set above the threshold, or None."""
+        best, best_similarity = None, self.threshold
+        candidates = {rep for key in band_keys for rep in self._buckets.get(key, ())}
+        for rep in candidates:
+            other = self._shingles[rep]
+            similarity = len(shingle_set & other) / len(shingle_set | other)
+            if similarity >= best_similarity:
+                best, best_similarity = rep, similarity
+        return best
+
+    def _assign(self, processed):
+        """Return (representative id, whether it is new) for one preprocessed text."""
+        rep = self._exact.get(processed)
+        if rep is not None:
+            self.exact_duplicates += 1
+            metrics.DUPLICATES.inc(kind="exact")
+            return rep, False
+
+        shingle_set = shingles(processed, self.shingle_size)
+        band_keys = self._band_keys(self._signature(shingle_set))
+        rep = self._find_near(shingle_set, band_keys)
+        if rep is not None:
+            self._exact[processed] = rep
+            self.near_duplicates += 1
+            metrics.DUPLICATES.inc(kind="near")
+            return rep, False
+
+        rep = len(self._shingles)
+        self._shingles.append(shingle_set)
+        self._results.append(None)
+        self._exact[processed] = rep
+        for key in band_keys:
+            self._buckets.setdefault(key, []).append(rep)
+        return rep, True
+
+    def score(self, texts, score_fn):
+        """
+        Score texts, calling score_fn(texts) only for one representative per cluster
+        Returns score_fn's result for each text's representative, in input order.
+        """
+        assignment = []
+        new = []
+        for index, text in enumerate(texts):
+            rep, is_new = self._assign(preprocess_text(text))
+            assignment.append(rep)
+            if is_new:
+                new.append((rep, index))
+
+        for (rep, _), result in zip(new, score_fn([texts[index] for _, index in new])):
+            self._results[rep] = result
+
+        self.reviews += len(texts)
+        return [self._results[rep] for rep in assignment]
+
+    def stats(self):
+        """Return how many reviews were scored and how many were answered from a duplicate."""
+        duplicates = self.exact_duplicates + self.near_duplicates
+        return {
+            "reviews": self.reviews,
+            "scored": self.reviews - duplicates,
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "compute_saved": duplicates / self.reviews if self.reviews else 0.0
+        }
@@ -0,0 +1,148 @@
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from sentiment_model import SentimentAnalyzer, ONNX_MODEL_FILE
+import torch
+import numpy as np
+import pandas as pd
+import argparse
+import logging
+import time
+import os
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SAMPLE_TEXTS = [
+    "This product is amazing! Works perfectly.",
+    "Terrible quality, broke after first use.",
+    "It's okay, nothing special but does the job.",
+    "Highly recommend this product, excellent value!",
+    "Don't waste your money on this."
+]
+
+class LogitsOnly(torch.nn.Module):
+    """Wrap a sequence classifier so the exported graph returns plain logits"""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask, token_type_ids=None):
+        return self.model(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            token_type_ids=token_type_ids
+        ).logits
+
+def export_onnx(model_path="./sentiment_model_finetuned", output_dir="./sentiment_model_onnx", int8=False):
+    """
+    Export the fine-tuned model to an ONNX graph SentimentAnalyzer can load with backend="onnx"
+    With int8=True the graph is additionally dynamically quantized to INT8 weights.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    logger.info(f"Loading model from {model_path}")
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModelForSequenceClassification.from_pretrained(model_path)
+    model.eval()
+
+    dummy = tokenizer(SAMPLE_TEXTS[:2], return_tensors="pt", padding=True, truncation=True, max_length=512)
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    output_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+    logger.info(f"Exporting ONNX graph to {output_path}")
+    with torch.no_grad():
+        torch.onnx.export(
+            LogitsOnly(model),
+            tuple(dummy[name] for name in input_names),
+            output_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+
+    if int8:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        fp32_path = os.path.join(output_dir, "model.fp32.onnx")
+        os.replace(output_path, fp32_path)
+        logger.info("Quantizing ONNX graph to INT8")
+        quantize_dynamic(fp32_path, output_path, weight_type=QuantType.QInt8)
+
+    # Tokenizer files are needed so the directory loads as a model_path.
+    tokenizer.save_pretrained(output_dir)
+    model.config.save_pretrained(output_dir)
+    logger.info(f"Export complete: {output_dir}")
+    return output_dir
+
+def measure_latency(analyzer, texts, batch_size=32, repeats=3):
+    """Return the best wall-clock seconds for scoring texts with predict_batch"""
+    analyzer.predict_batch(texts[:batch_size], batch_size=batch_size)  # Warm up.
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        analyzer.predict_batch(texts, batch_size=batch_size)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def check_parity(model_path="./sentiment_model_finetuned", onnx_path="./sentiment_model_onnx",
+                 backends=("quantized", "onnx"), texts=None, batch_size=32):
+    """
+    Compare optimized backends against the eager PyTorch model
+    Reports max probability drift, rating agreement and latency per backend.
+    """
+    texts = texts or SAMPLE_TEXTS
+    reference = SentimentAnalyzer(model_path, backend="pytorch")
+    reference_results = reference.predict_batch(texts, batch_size=batch_size, confidence_threshold=0.0)
+    reference_probs = np.stack([probs for _, _, probs in reference_results])
+    reference_time = measure_latency(reference, texts, batch_size)
+
+    report = {"pytorch": {"seconds": reference_time, "speedup": 1.0}}
+    for backend in backends:
+        path = onnx_path if backend == "onnx" else model_path
+        if backend == "onnx" and not os.path.exists(os.path.join(onnx_path, ONNX_MODEL_FILE)):
+            logger.warning(f"Skipping onnx backend: no {ONNX_MODEL_FILE} in {onnx_path}")
+            continue
+
+        analyzer = SentimentAnalyzer(path, backend=backend)
+        results = analyzer.predict_batch(texts, batch_size=batch_size, confidence_threshold=0.0)
+        probs = np.stack([p for _, _, p in results])
+        seconds = measure_latency(analyzer, texts, batch_size)
+
+        report[backend] = {
+            "max_probability_drift": float(np.abs(probs - reference_probs).max()),
+            "rating_agreement": float((probs.argmax(axis=1) == reference_probs.argmax(axis=1)).mean()),
+            "seconds": seconds,
+            "speedup": reference_time / seconds if seconds else float("inf")
+        }
+
+    for backend, stats in report.items():
+        logger.info(f"{backend}: {stats}")
+    return report
+
+def load_parity_texts(csv_path, limit):
+    """Load review texts for the parity check from a CSV with a review_text column"""
+    if csv_path and os.path.exists(csv_path):
+        return pd.read_csv(csv_path, nrows=limit)["review_text"].fillna("").astype(str).tolist()
+    return SAMPLE_TEXTS
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export optimized inference artifacts and check backend parity")
+    parser.add_argument("--model-path", default="./sentiment_model_finetuned")
+    parser.add_argument("--output-dir", default="./sentiment_model_onnx")
+    parser.add_argument("--int8", action="store_true", help="Quantize the exported ONNX graph to INT8")
+    parser.add_argument("--skip-export", action="store_true", help="Only run the parity check")
+    parser.add_argument("--parity-csv", default="data/amazon_reviews_test.csv")
+    parser.add_argument("--parity-samples", type=int, default=256)
+    args = parser.parse_args()
+
+    if not args.skip_export:
+        export_onnx(args.model_path, args.output_dir, int8=args.int8)
+
+    check_parity(
+        args.model_path,
+        args.output_dir,
+        texts=load_parity_texts(args.parity_csv, args.parity_samples)
+    )
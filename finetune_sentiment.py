@@ -4,18 +4,29 @@ from transformers import (
     AutoModelForSequenceClassification,
     Trainer, 
     TrainingArguments,
-    EarlyStoppingCallback
+    EarlyStoppingCallback,
+    DataCollatorWithPadding
 )
 import pandas as pd
 import numpy as np
-from datasets import Dataset as HFDataset
+from datasets import load_dataset, load_from_disk
 from sklearn.metrics import accuracy_score, f1_score
+import argparse
+import hashlib
 import logging
+import shutil
+import copy
+import json
+import time
+import re
 import os
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+TOKENIZED_CACHE_DIR = "./cache/tokenized"
+TOKENIZE_VERSION = 1  # Bump when tokenize_function changes to invalidate cached shards.
+
 def check_gpu():
     """Check GPU availability and print device information"""
     if torch.cuda.is_available():
@@ -28,18 +39,23 @@ def check_gpu():
         logger.warning("No GPU available, using CPU. This will be much slower!")
     return device
 
-def tokenize_function(examples, tokenizer):
-    """Tokenize the texts and prepare the targets"""
+def tokenize_function(examples, tokenizer, max_length=512):
+    """Tokenize the texts and prepare the targets; padding is left to the collator"""
     tokenized = tokenizer(
-        examples['review_text'],
-        padding='max_length',
+        [text or "" for text in examples['review_text']],
         truncation=True,
-        max_length=512
+        max_length=max_length
     )
     
     tokenized['labels'] = [rating - 1 for rating in examples['rating']]
+    tokenized['length'] = [len(ids) for ids in tokenized['input_ids']]  # Used to group similar lengths.
     return tokenized
 
+def build_data_collator(tokenizer):
+    """Pad each batch only to its own longest example"""
+    # Multiples of 8 let fp16 tensor cores kick in on GPU.
+    return DataCollatorWithPadding(tokenizer, pad_to_multiple_of=8 if torch.cuda.is_available() else None)
+
 def compute_metrics(eval_pred):
     """Compute metrics for evaluation"""
     predictions, labels = eval_pred
@@ -50,6 +66,255 @@ def compute_metrics(eval_pred):
         'f1_macro': f1_score(labels, predictions, average='macro')
     }
 
+def file_hash(path):
+    """SHA-256 of a file's contents, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def tokenized_cache_key(tokenizer, paths, max_length):
+    """Cache key covering the input files, the tokenizer and max_length"""
+    digest = hashlib.sha256()
+    digest.update(f"v{TOKENIZE_VERSION}:{type(tokenizer).__name__}:{tokenizer.name_or_path}:{max_length}".encode())
+    digest.update(json.dumps(tokenizer.get_vocab(), sort_keys=True).encode())
+    digest.update(json.dumps(tokenizer.special_tokens_map, sort_keys=True).encode())
+    for path in paths:
+        digest.update(file_hash(path).encode())
+    return digest.hexdigest()[:16]
+
+def swap_into_place(tmp_path, cache_path):
+    """
+    Move a finished cache directory from tmp_path to cache_path
+    os.replace can't overwrite a non-empty directory, so a leftover directory
+    at cache_path is moved aside and deleted first. If a concurrent run already
+    completed the same cache, it is kept and tmp_path is discarded.
+    """
+    if os.path.exists(os.path.join(cache_path, "dataset_dict.json")):
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        return
+    if os.path.exists(cache_path):
+        stale_path = f"{cache_path}.stale-{os.getpid()}"
+        os.replace(cache_path, stale_path)
+        shutil.rmtree(stale_path, ignore_errors=True)
+    try:
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # Another run moved its copy into place in the meantime.
+        if not os.path.exists(os.path.join(cache_path, "dataset_dict.json")):
+            raise
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+def load_datasets(tokenizer, train_path, test_path, max_length=512, cache_dir=TOKENIZED_CACHE_DIR):
+    """
+    Load the train/test CSVs tokenized for the Trainer
+    Tokenized splits are saved as Arrow shards under cache_dir and reopened
+    memory-mapped on later runs, so re-runs and sweeps skip reading and tokenizing.
+    """
+    cache_path = os.path.join(cache_dir, tokenized_cache_key(tokenizer, [train_path, test_path], max_length))
+    if os.path.exists(os.path.join(cache_path, "dataset_dict.json")):
+        logger.info(f"Loading tokenized datasets from {cache_path}")
+        tokenized = load_from_disk(cache_path)
+        return tokenized["train"], tokenized["validation"]
+
+    # Read the CSVs straight into Arrow instead of a pandas frame.
+    logger.info("Loading data...")
+    raw = load_dataset("csv", data_files={"train": train_path, "validation": test_path})
+
+    # Tokenize datasets.
+    logger.info("Tokenizing datasets...")
+    tokenized = raw.map(
+        lambda x: tokenize_function(x, tokenizer, max_length),
+        batched=True,
+        remove_columns=raw["train"].column_names
+    )
+
+    # Write to a per-process temporary directory first so an interrupted run leaves no
+    # partial cache and concurrent runs don't write into each other's files.
+    logger.info(f"Saving tokenized datasets to {cache_path}")
+    tmp_path = f"{cache_path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tokenized.save_to_disk(tmp_path)
+    swap_into_place(tmp_path, cache_path)
+
+    # Reopen memory-mapped from the cache.
+    tokenized = load_from_disk(cache_path)
+    return tokenized["train"], tokenized["validation"]
+
+def build_training_args(output_dir, num_train_epochs=3, learning_rate=2e-5):
+    """Training arguments shared by fine-tuning and distillation."""
+    use_gpu = torch.cuda.is_available()
+    return TrainingArguments(
+        output_dir=output_dir,
+        num_train_epochs=num_train_epochs,
+        per_device_train_batch_size=32,  # Increased for 8GB VRAM
+        per_device_eval_batch_size=64,
+        warmup_steps=500,
+        weight_decay=0.01,
+        logging_dir='./logs',
+        logging_steps=50,
+        eval_steps=200,
+        save_steps=200,
+        eval_strategy="steps",
+        load_best_model_at_end=True,
+        metric_for_best_model="f1_macro",
+        greater_is_better=True,
+        learning_rate=learning_rate,
+        gradient_accumulation_steps=1,  # No need for accumulation with larger batch size.
+        group_by_length=True,  # Batch similar lengths together so dynamic padding stays small.
+        length_column_name="length",
+        use_cpu=not use_gpu,
+        fp16=use_gpu,  # Mixed precision only on GPU.
+        report_to="none",
+        dataloader_num_workers=4 if use_gpu else 0,  # Collation is cheap; workers only help on GPU.
+        dataloader_pin_memory=use_gpu,
+    )
+
+class DistillationTrainer(Trainer):
+    """Trainer whose loss mixes the teacher's temperature-softened labels with the hard labels."""
+
+    def __init__(self, *args, teacher_model=None, temperature=2.0, alpha=0.5, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.teacher_model = teacher_model
+        self.temperature = temperature
+        self.alpha = alpha
+        self.teacher_model.eval()
+
+    def compute_loss(self, model, inputs, return_outputs=False, **kwargs):
+        outputs = model(**inputs)
+        with torch.no_grad():
+            teacher_logits = self.teacher_model(**inputs).logits
+
+        # KL between softened distributions, scaled by T^2 to keep gradient magnitudes comparable.
+        soft_loss = torch.nn.functional.kl_div(
+            torch.nn.functional.log_softmax(outputs.logits / self.temperature, dim=-1),
+            torch.nn.functional.softmax(teacher_logits / self.temperature, dim=-1),
+            reduction="batchmean"
+        ) * self.temperature ** 2
+        loss = self.alpha * soft_loss + (1 - self.alpha) * outputs.loss
+        return (loss, outputs) if return_outputs else loss
+
+def build_student(teacher, num_layers=4, hidden_size=None, num_heads=None):
+    """
+    Create a smaller student from the teacher's config
+    With the teacher's hidden size, the student starts from the teacher's embeddings,
+    evenly spaced encoder layers and classifier; a narrower student starts from scratch.
+    A narrower student has num_heads attention heads, by default one per 64 hidden
+    units; hidden_size must be divisible by the head count.
+    """
+    config = copy.deepcopy(teacher.config)
+    config.num_hidden_layers = num_layers
+    if hidden_size and hidden_size != teacher.config.hidden_size:
+        if num_heads is None:
+            if hidden_size % 64:
+                raise ValueError(f"Student hidden size {hidden_size} is not a multiple of 64; pass num_heads")
+            num_heads = hidden_size // 64
+        if num_heads < 1 or hidden_size % num_heads:
+            raise ValueError(f"Student hidden size {hidden_size} is not divisible by {num_heads} attention heads")
+        config.hidden_size = hidden_size
+        config.intermediate_size = hidden_size * 4
+        config.num_attention_heads = num_heads
+        return AutoModelForSequenceClassification.from_config(config)
+
+    student = AutoModelForSequenceClassification.from_config(config)
+    teacher_state = teacher.state_dict()
+    step = teacher.config.num_hidden_layers / num_layers
+    layer_map = {int(i * step + step - 1): i for i in range(num_layers)}  # Keep the top layer of each block.
+
+    student_state = {}
+    for name, tensor in teacher_state.items():
+        match = re.search(r"encoder\.layer\.(\d+)\.", name)
+        if match is None:
+            student_state[name] = tensor
+        elif int(match.group(1)) in layer_map:
+            student_state[name.replace(f"encoder.layer.{match.group(1)}.",
+                                       f"encoder.layer.{layer_map[int(match.group(1))]}.")] = tensor
+    student.load_state_dict(student_state, strict=False)
+    return student
+
+def measure_cpu_inference(model, tokenizer, texts, labels, batch_size=32):
+    """Return accuracy, macro F1 and per-review latency of a model on CPU."""
+    model = model.to("cpu").eval()
+    predictions = []
+    start = time.perf_counter()
+    with torch.no_grad():
+        for i in range(0, len(texts), batch_size):
+            inputs = tokenizer(texts[i:i + batch_size], return_tensors="pt", truncation=True,
+                               padding=True, max_length=512)
+            predictions.extend(model(**inputs).logits.argmax(dim=-1).tolist())
+    seconds = time.perf_counter() - start
+    return {
+        "accuracy": accuracy_score(labels, predictions),
+        "f1_macro": f1_score(labels, predictions, average='macro'),
+        "ms_per_review": 1000 * seconds / len(texts),
+        "parameters": sum(p.numel() for p in model.parameters())
+    }
+
+def compare_teacher_student(teacher_dir, student_dir, test_path, num_samples=500):
+    """Write a CPU latency and accuracy report comparing teacher and student."""
+    sample_df = pd.read_csv(test_path).sample(frac=1.0, random_state=42).head(num_samples)
+    texts = sample_df['review_text'].fillna('').astype(str).tolist()
+    labels = [rating - 1 for rating in sample_df['rating']]
+    tokenizer = AutoTokenizer.from_pretrained(teacher_dir)
+
+    report = {
+        "teacher": measure_cpu_inference(AutoModelForSequenceClassification.from_pretrained(teacher_dir),
+                                         tokenizer, texts, labels),
+        "student": measure_cpu_inference(AutoModelForSequenceClassification.from_pretrained(student_dir),
+                                         tokenizer, texts, labels),
+        "num_samples": len(texts)
+    }
+    report["speedup"] = report["teacher"]["ms_per_review"] / report["student"]["ms_per_review"]
+    report["f1_change"] = report["student"]["f1_macro"] - report["teacher"]["f1_macro"]
+
+    logger.info(f"Distillation report: {report}")
+    with open(os.path.join(student_dir, 'distillation_report.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+def benchmark_throughput(model_name="nlptown/bert-base-multilingual-uncased-sentiment",
+                         train_path="data/amazon_reviews_train.csv", num_samples=512, batch_size=16):
+    """
+    Compare training throughput (samples/sec) on a fixed subset
+    "fixed_padding" pads every example to 512 tokens in file order (the previous
+    behaviour); "dynamic_padding" pads each length-grouped batch to its own longest example.
+    """
+    device = check_gpu()
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name, num_labels=5).to(device)
+    model.train()
+
+    sample_df = pd.read_csv(train_path, nrows=num_samples)
+    texts = sample_df['review_text'].fillna('').astype(str).tolist()
+    labels = [rating - 1 for rating in sample_df['rating']]
+    lengths = [len(ids) for ids in tokenizer(texts, truncation=True, max_length=512)['input_ids']]
+
+    def run(order, padding):
+        start = time.perf_counter()
+        for i in range(0, len(order), batch_size):
+            batch = order[i:i + batch_size]
+            inputs = tokenizer([texts[j] for j in batch], padding=padding, truncation=True,
+                               max_length=512, return_tensors="pt").to(device)
+            outputs = model(**inputs, labels=torch.tensor([labels[j] for j in batch], device=device))
+            outputs.loss.backward()
+            model.zero_grad()
+        if device.type == "cuda":
+            torch.cuda.synchronize()
+        return len(order) / (time.perf_counter() - start)
+
+    run(list(range(min(batch_size, len(texts)))), "longest")  # Warm up.
+    report = {
+        "fixed_padding": run(list(range(len(texts))), "max_length"),
+        "dynamic_padding": run(sorted(range(len(texts)), key=lambda i: lengths[i]), "longest"),
+        "num_samples": len(texts),
+        "batch_size": batch_size,
+        "device": device.type
+    }
+    report["speedup"] = report["dynamic_padding"] / report["fixed_padding"]
+    logger.info(f"Training throughput (samples/sec): {report}")
+    return report
+
 def main():
     # Check GPU availability.
     device = check_gpu()
@@ -78,54 +343,9 @@ def main():
     logger.info(f"Model moved to: {next(model.parameters()).device}")
 
     # Load and prepare data.
-    logger.info("Loading data...")
-    train_df = pd.read_csv(TRAIN_DATA_PATH)
-    val_df = pd.read_csv(TEST_DATA_PATH)
-    
-    # Convert to HuggingFace datasets.
-    train_dataset = HFDataset.from_pandas(train_df)
-    val_dataset = HFDataset.from_pandas(val_df)
-
-    # Tokenize datasets.
-    logger.info("Tokenizing datasets...")
-    train_dataset = train_dataset.map(
-        lambda x: tokenize_function(x, tokenizer),
-        batched=True,
-        remove_columns=train_dataset.column_names
-    )
-    val_dataset = val_dataset.map(
-        lambda x: tokenize_function(x, tokenizer),
-        batched=True,
-        remove_columns=val_dataset.column_names
-    )
+    train_dataset, val_dataset = load_datasets(tokenizer, TRAIN_DATA_PATH, TEST_DATA_PATH)
 
-    # Set format for pytorch.
-    train_dataset.set_format('torch', columns=['input_ids', 'attention_mask', 'labels'])
-    val_dataset.set_format('torch', columns=['input_ids', 'attention_mask', 'labels'])
-
-    # Training arguments optimized for GPU.
-    training_args = TrainingArguments(
-        output_dir=OUTPUT_DIR,
-        num_train_epochs=3,
-        per_device_train_batch_size=32,  # Increased for 8GB VRAM
-        per_device_eval_batch_size=64,
-        warmup_steps=500,
-        weight_decay=0.01,
-        logging_dir='./logs',
-        logging_steps=50,
-        eval_steps=200,
-        save_steps=200,
-        eval_strategy="steps",
-        load_best_model_at_end=True,
-        metric_for_best_model="f1_macro",
-        greater_is_better=True,
-        learning_rate=2e-5,
-        gradient_accumulation_steps=1,  # No need for accumulation with larger batch size.
-        fp16=True,  # Enable mixed precision training.
-        report_to="none",
-        dataloader_num_workers=4,  # Increased for faster data loading.
-        dataloader_pin_memory=True,
-    )
+    training_args = build_training_args(OUTPUT_DIR)
 
     # Initialize trainer.
     logger.info("Initializing trainer...")
@@ -134,6 +354,7 @@ def main():
         args=training_args,
         train_dataset=train_dataset,
         eval_dataset=val_dataset,
+        data_collator=build_data_collator(tokenizer),
         compute_metrics=compute_metrics,
         callbacks=[EarlyStoppingCallback(early_stopping_patience=3)]
     )
@@ -162,9 +383,81 @@ def main():
     with open(os.path.join(OUTPUT_DIR, 'eval_results.txt'), 'w') as f:
         f.write(str(eval_results))
 
+def distill(teacher_dir="./sentiment_model_finetuned", output_dir="./sentiment_model_student",
+            train_path="data/amazon_reviews_train.csv", test_path="data/amazon_reviews_test.csv",
+            num_layers=4, hidden_size=None, num_heads=None, temperature=2.0, alpha=0.5, num_train_epochs=3):
+    """Train a smaller student against the fine-tuned teacher's soft labels."""
+    device = check_gpu()
+    os.makedirs(output_dir, exist_ok=True)
+    os.makedirs('logs', exist_ok=True)
+
+    logger.info(f"Loading teacher from {teacher_dir}...")
+    tokenizer = AutoTokenizer.from_pretrained(teacher_dir)
+    teacher = AutoModelForSequenceClassification.from_pretrained(teacher_dir).to(device)
+    student = build_student(teacher, num_layers=num_layers, hidden_size=hidden_size, num_heads=num_heads).to(device)
+    logger.info(f"Teacher parameters: {sum(p.numel() for p in teacher.parameters()):,}, "
+                f"student parameters: {sum(p.numel() for p in student.parameters()):,}")
+
+    train_dataset, val_dataset = load_datasets(tokenizer, train_path, test_path)
+
+    trainer = DistillationTrainer(
+        model=student,
+        args=build_training_args(output_dir, num_train_epochs=num_train_epochs, learning_rate=5e-5),
+        train_dataset=train_dataset,
+        eval_dataset=val_dataset,
+        data_collator=build_data_collator(tokenizer),
+        compute_metrics=compute_metrics,
+        callbacks=[EarlyStoppingCallback(early_stopping_patience=3)],
+        teacher_model=teacher,
+        temperature=temperature,
+        alpha=alpha
+    )
+
+    logger.info("Starting distillation...")
+    trainer.train()
+
+    # Saved like the teacher, so SentimentAnalyzer(output_dir) loads it directly.
+    logger.info(f"Saving student to {output_dir}")
+    trainer.save_model(output_dir)
+    tokenizer.save_pretrained(output_dir)
+
+    eval_results = trainer.evaluate()
+    logger.info(f"Student evaluation results: {eval_results}")
+    with open(os.path.join(output_dir, 'eval_results.txt'), 'w') as f:
+        f.write(str(eval_results))
+
+    return compare_teacher_student(teacher_dir, output_dir, test_path)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fine-tune the sentiment model or distill it into a smaller student")
+    parser.add_argument("--mode", choices=["finetune", "distill", "benchmark"], default="finetune")
+    parser.add_argument("--benchmark-samples", type=int, default=512)
+    parser.add_argument("--teacher-dir", default="./sentiment_model_finetuned")
+    parser.add_argument("--student-dir", default="./sentiment_model_student")
+    parser.add_argument("--student-layers", type=int, default=4)
+    parser.add_argument("--student-hidden-size", type=int, default=None,
+                        help="Narrower hidden size (student is then trained from scratch)")
+    parser.add_argument("--student-heads", type=int, default=None,
+                        help="Attention heads of a narrower student (default: hidden size / 64)")
+    parser.add_argument("--temperature", type=float, default=2.0)
+    parser.add_argument("--alpha", type=float, default=0.5, help="Weight of the soft-label loss")
+    args = parser.parse_args()
+
     try:
-        main()
+        if args.mode == "benchmark":
+            benchmark_throughput(num_samples=args.benchmark_samples)
+        elif args.mode == "distill":
+            distill(
+                teacher_dir=args.teacher_dir,
+                output_dir=args.student_dir,
+                num_layers=args.student_layers,
+                hidden_size=args.student_hidden_size,
+                num_heads=args.student_heads,
+                temperature=args.temperature,
+                alpha=args.alpha
+            )
+        else:
+            main()
     except Exception as e:
         logger.error(f"An error occurred: {str(e)}")
-        raise e
\ No newline at end of file
+        raise e
@@ -0,0 +1,124 @@
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import requests
+import pickle
+import threading
+import os
+
+REVIEW_BODY_ATTRS = {"data-hook": "review-body"}
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# Markers of pages that need a real browser (captcha or sign-in wall).
+CAPTCHA_MARKERS = ("/errors/validateCaptcha", "Type the characters you see in this image", 'name="captcha"')
+LOGIN_MARKERS = ("ap/signin",)
+# Rate limiting and Amazon's "service unavailable" bot responses; the browser usually gets through.
+THROTTLE_STATUS_CODES = (429, 503)
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+
+class BlockedPageError(Exception):
+    """Raised when a page is a login wall, captcha or throttled response that needs the browser flow."""
+
+
+class HttpReviewScraper:
+    """
+    Lightweight review scraper using a pooled keep-alive HTTP session.
+
+    Uses the same cookies.pkl as the Selenium flow and only parses the
+    review-body spans, so most pages are scraped without a browser.
+    """
+
+    def __init__(self, cookies_file="cookies.pkl", timeout=10, pool_size=10):
+        self.cookies_file = cookies_file
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        # Connection errors are retried; throttled responses go straight to the browser fallback
+        # instead of sleeping through Retry-After.
+        retries = Retry(total=2, respect_retry_after_header=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "en-US,en;q=0.9"
+        })
+
+        self._cookies_mtime = None
+        self._cookies_lock = threading.Lock()
+        self.refresh_cookies()
+
+    def refresh_cookies(self):
+        """(Re)load cookies.pkl into the session if it changed since the last load."""
+        with self._cookies_lock:
+            if not os.path.exists(self.cookies_file):
+                return
+            mtime = os.path.getmtime(self.cookies_file)
+            if mtime == self._cookies_mtime:
+                return
+
+            try:
+                with open(self.cookies_file, "rb") as file:
+                    cookies = pickle.load(file)
+                for cookie in cookies:
+                    self.session.cookies.set(
+                        cookie["name"],
+                        cookie["value"],
+                        domain=".amazon.com",
+                        path=cookie.get("path", "/")
+                    )
+                self._cookies_mtime = mtime
+                print("Cookies loaded into HTTP session.")
+            except Exception as e:
+                print(f"Error loading cookies: {e}")
+
+    @staticmethod
+    def parse_reviews(html):
+        """Extract review texts from a review page."""
+        soup = BeautifulSoup(html, HTML_PARSER, parse_only=SoupStrainer("span", attrs=REVIEW_BODY_ATTRS))
+        return [span.get_text(" ", strip=True) for span in soup.find_all("span", attrs=REVIEW_BODY_ATTRS)]
+
+    @staticmethod
+    def check_blocked(response):
+        """Raise BlockedPageError if the response is a captcha or sign-in page or was throttled."""
+        if any(marker in response.url for marker in LOGIN_MARKERS):
+            raise BlockedPageError(f"Redirected to sign-in: {response.url}")
+        if any(marker in response.text for marker in CAPTCHA_MARKERS):
+            raise BlockedPageError("Captcha page")
+        if response.status_code in THROTTLE_STATUS_CODES:
+            raise BlockedPageError(f"Throttled with HTTP {response.status_code}")
+
+    def fetch_page(self, url):
+        """Fetch one review page and return its review texts."""
+        self.refresh_cookies()
+        response = self.session.get(url, timeout=self.timeout)
+        self.check_blocked(response)
+        response.raise_for_status()
+        return self.parse_reviews(response.text)
+
+
+_http_scraper = None
+_http_scraper_pid = None
+_http_scraper_lock = threading.Lock()
+
+
+def get_http_scraper(cookies_file="cookies.pkl"):
+    """Return this process's HTTP scraper, creating it on first use."""
+    global _http_scraper, _http_scraper_pid
+
+    with _http_scraper_lock:
+        # Connection pools can't be shared with forked workers.
+        if _http_scraper is None or _http_scraper_pid != os.getpid():
+            _http_scraper = HttpReviewScraper(
+                cookies_file=cookies_file,
+                timeout=float(os.getenv("SCRAPER_PAGE_TIMEOUT", "10"))
+            )
+            _http_scraper_pid = os.getpid()
+        return _http_scraper
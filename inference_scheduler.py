@@ -0,0 +1,225 @@
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import nullcontext
+import metrics
+import threading
+import time
+import logging
+import os
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class InferenceScheduler:
+    """
+    Dynamic micro-batching front end for a SentimentAnalyzer.
+
+    Texts submitted by concurrent requests are queued and merged into shared
+    batches, limited by max_batch_size, max_batch_tokens and max_wait_ms. The
+    token budget counts every model input (a long text may be split into
+    several) padded to the batch's longest input.
+    Each result is routed back to the request that submitted it; a request
+    waits at most result_timeout seconds for its results.
+    """
+
+    def __init__(self, analyzer, max_batch_size=32, max_batch_tokens=8192, max_wait_ms=10, result_timeout=120):
+        self.analyzer = analyzer
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_wait = max_wait_ms / 1000.0
+        self.result_timeout = result_timeout
+
+        self._queue = []
+        self._condition = threading.Condition()
+        self._start_lock = threading.Lock()
+        self._running = True
+
+        # Statistics.
+        self._batches = 0
+        self._items = 0
+        self._tokens = 0
+        self._padded_tokens = 0
+        self._max_batch_seen = 0
+        self._max_queue_depth = 0
+
+        # The worker thread is started lazily so a scheduler created before a
+        # fork (e.g. gunicorn --preload) gets its own thread in each worker.
+        self._worker = None
+        self._worker_pid = None
+
+    def _ensure_worker(self):
+        """Start the worker thread in the current process if it is not running"""
+        if self._worker_pid == os.getpid() and self._worker.is_alive():
+            return
+        if self._worker_pid != os.getpid():
+            # Locks and queued futures inherited from the parent are not usable here.
+            self._condition = threading.Condition()
+            self._queue = []
+        self._worker = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+        self._worker_pid = os.getpid()
+        self._worker.start()
+
+    def submit(self, texts, confidence_threshold=0.6, timeout=None):
+        """
+        Queue texts for scoring and block until all of them are scored
+        timeout defaults to result_timeout; concurrent.futures.TimeoutError is
+        raised (and the request's queued texts dropped) if it passes first.
+        Returns list of (rating, confidence, probabilities) tuples in input order
+        """
+        if not texts:
+            return []
+
+        # Cache hits are answered directly and never take a batch slot.
+        results = self.analyzer.cached_predictions(texts, confidence_threshold)
+        missing = [i for i, result in enumerate(results) if result is None]
+        if not missing:
+            return results
+
+        # Preprocess, run the cascade and tokenize in the caller's thread; the
+        # encodings are queued, so the worker only pads and runs forward passes.
+        encoded = self.analyzer.encode([texts[i] for i in missing])
+        pending = [(i, item) for i, item in zip(missing, encoded) if item[2] is not None]
+
+        # Cascade answers and texts that failed to tokenize need no forward pass.
+        answered = [(i, item) for i, item in zip(missing, encoded) if item[2] is None]
+        if answered:
+            scored = self.analyzer.predict_encoded([item for _, item in answered],
+                                                   confidence_threshold=confidence_threshold)
+            for (i, _), result in zip(answered, scored):
+                results[i] = result
+        if not pending:
+            return results
+
+        shapes = self.analyzer.encoded_shapes([item for _, item in pending])
+        # Forward passes run on the worker thread; count them toward this request's timings.
+        timings = metrics.current_timings()
+        futures = []
+
+        with self._start_lock:
+            self._ensure_worker()
+
+        with self._condition:
+            if not self._running:
+                raise RuntimeError("Inference scheduler is shut down")
+            for (_, item), shape in zip(pending, shapes):
+                future = Future()
+                self._queue.append((item, shape, confidence_threshold, future, timings))
+                futures.append(future)
+            self._max_queue_depth = max(self._max_queue_depth, len(self._queue))
+            self._condition.notify()
+
+        deadline = time.monotonic() + (self.result_timeout if timeout is None else timeout)
+        try:
+            for (i, _), future in zip(pending, futures):
+                results[i] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            # Texts not yet taken by the worker are dropped from the queue.
+            for future in futures:
+                future.cancel()
+            raise
+        return results
+
+    def _next_batch(self):
+        """Wait for pending work and take the next batch off the queue"""
+        with self._condition:
+            while True:
+                while self._running and not self._queue:
+                    self._condition.wait()
+                if not self._running and not self._queue:
+                    return []
+
+                # Give concurrent requests a short window to join the batch.
+                deadline = time.monotonic() + self.max_wait
+                while self._running and len(self._queue) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+                # Drop texts whose request gave up waiting.
+                self._queue = [item for item in self._queue if not item[3].cancelled()]
+                if self._queue:
+                    break
+
+            # Take the longest prefix of the queue that fits the batch limits.
+            batch = []
+            inputs = 0
+            longest = 0
+            for item in self._queue:
+                item_inputs, item_longest = item[1]
+                longest_if_added = max(longest, item_longest)
+                if batch and (len(batch) >= self.max_batch_size or
+                              (inputs + item_inputs) * longest_if_added > self.max_batch_tokens):
+                    break
+                batch.append(item)
+                inputs += item_inputs
+                longest = longest_if_added
+            del self._queue[:len(batch)]
+            return batch
+
+    def _run(self):
+        """Worker loop: form batches and run them through the analyzer"""
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+
+            # Texts cancelled after being taken off the queue are skipped.
+            batch = [item for item in batch if item[3].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            # A shared batch's stages count in full toward every request with texts in it.
+            targets = list({id(timings): timings for item in batch for timings in item[4]}.values())
+            try:
+                with metrics.collect_timings(*targets) if targets else nullcontext():
+                    # Thresholds are applied per request below, so score without one here.
+                    results = self.analyzer.predict_encoded(
+                        [item[0] for item in batch],
+                        batch_size=self.max_batch_size,
+                        confidence_threshold=0.0,
+                        max_batch_tokens=self.max_batch_tokens
+                    )
+            except Exception as e:
+                logger.error(f"Error in scheduled batch: {str(e)}")
+                for item in batch:
+                    item[3].set_exception(e)
+                continue
+
+            for (_, _, threshold, future, _), (rating, confidence, probabilities) in zip(batch, results):
+                if rating is not None and confidence < threshold:
+                    rating = None
+                future.set_result((rating, confidence, probabilities))
+
+            self._record_batch(batch)
+
+    def _record_batch(self, batch):
+        """Update batch statistics"""
+        shapes = [item[1] for item in batch]
+        with self._condition:
+            self._batches += 1
+            self._items += len(batch)
+            self._tokens += sum(inputs * longest for inputs, longest in shapes)
+            self._padded_tokens += sum(inputs for inputs, _ in shapes) * max(longest for _, longest in shapes)
+            self._max_batch_seen = max(self._max_batch_seen, len(batch))
+
+    def stats(self):
+        """Return queue depth and batch-size statistics"""
+        with self._condition:
+            return {
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self._max_queue_depth,
+                "batches": self._batches,
+                "items": self._items,
+                "average_batch_size": self._items / self._batches if self._batches else 0.0,
+                "max_batch_size": self._max_batch_seen,
+                "average_batch_tokens": self._tokens / self._batches if self._batches else 0.0,
+                "padding_efficiency": self._tokens / self._padded_tokens if self._padded_tokens else 1.0
+            }
+
+    def shutdown(self):
+        """Stop the worker after draining queued work"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._worker is not None and self._worker_pid == os.getpid():
+            self._worker.join()
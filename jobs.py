@@ -0,0 +1,273 @@
+from concurrent.futures import ThreadPoolExecutor
+from sqlite_store import SQLiteConnection
+import metrics
+import threading
+import logging
+import sqlite3
+import json
+import time
+import uuid
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds between sweeps of expired jobs from the shared table.
+CLEANUP_INTERVAL = 60
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, snapshot TEXT NOT NULL, updated_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS job_items ("
+    "job_id TEXT, position INTEGER, item TEXT NOT NULL, PRIMARY KEY (job_id, position))"
+)
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity."""
+
+
+class Job:
+    """State of one background job: status, progress, partial results and the final result."""
+
+    def __init__(self, key, on_change=None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.on_change = on_change
+        self.status = "queued"
+        self.progress = {}
+        self.partial_results = []
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # When the job was last written to the shared table and how many partial results it holds.
+        self.persisted_at = None
+        self.persisted_items = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Mark the job as running."""
+        with self._lock:
+            self.status = "running"
+            self.started_at = time.time()
+        self._changed(force=True)
+
+    def finish(self, result):
+        """Mark the job as done with its final result."""
+        with self._lock:
+            self.result = result
+            self.status = "done"
+            self.finished_at = time.time()
+        self._changed(force=True)
+
+    def fail(self, error):
+        """Mark the job as failed."""
+        with self._lock:
+            self.error = error
+            self.status = "failed"
+            self.finished_at = time.time()
+        self._changed(force=True)
+
+    def report(self, items=(), **progress):
+        """Record progress from the runner; items are appended to the partial results."""
+        with self._lock:
+            self.partial_results.extend(items)
+            self.progress.update(progress)
+        self._changed()
+
+    def _changed(self, force=False):
+        # Status changes always reach on_change listeners; progress reports may be throttled.
+        if self.on_change is not None:
+            self.on_change(self, force)
+
+    def snapshot(self):
+        """Job state except partial results (see items_since) as a JSON-serializable dict."""
+        with self._lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "progress": dict(self.progress),
+                "result": self.result,
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at
+            }
+
+    def items_since(self, start):
+        """Partial results after the first start."""
+        with self._lock:
+            return self.partial_results[start:]
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Rebuild a read-only job from snapshot() and its partial_results."""
+        job = cls(key=None)
+        for name, value in snapshot.items():
+            setattr(job, name, value)
+        return job
+
+    def to_dict(self, since=None):
+        """Serialize for GET /jobs/<id>; since=N adds the partial results after the first N."""
+        with self._lock:
+            data = {
+                "job_id": self.id,
+                "status": self.status,
+                "progress": dict(self.progress),
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at
+            }
+            if since is not None:
+                data["new_results"] = self.partial_results[since:]
+                data["next_since"] = len(self.partial_results)
+            if self.status == "done":
+                data["result"] = self.result
+            elif self.status == "failed":
+                data["error"] = self.error
+            return data
+
+
+class JobManager:
+    """
+    Bounded local worker pool for background jobs.
+
+    At most max_workers jobs run at once and at most max_queue wait; further
+    submissions raise QueueFullError. Submissions whose key matches a queued or
+    running job return that job instead of starting a new one. Finished jobs are
+    kept for `retention` seconds.
+
+    With db_path set, job state is also written to SQLite so that any worker
+    process (see serve.py) can answer GET /jobs/<id> for a job run by another.
+    Status changes are written immediately and progress at most every
+    persist_interval seconds; partial results are appended as new rows rather
+    than rewritten with every report.
+    """
+
+    def __init__(self, runner, max_workers=2, max_queue=16, retention=3600, db_path=None, persist_interval=1.0):
+        self.runner = runner
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retention = retention
+        self.db_path = db_path
+        self.persist_interval = persist_interval
+
+        self._jobs = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._db = SQLiteConnection(db_path, SCHEMA)
+        self._db_lock = threading.Lock()
+        self._last_cleanup = 0.0
+
+    def _persist(self, job, force=True):
+        """Write a job's state and new partial results to the shared table; throttled unless force."""
+        if not self.db_path:
+            return
+        try:
+            with self._db_lock:
+                now = time.time()
+                if not force and job.persisted_at is not None and now - job.persisted_at < self.persist_interval:
+                    return
+
+                items = job.items_since(job.persisted_items)
+                db = self._db.connect()
+                db.execute("INSERT OR REPLACE INTO jobs VALUES (?, ?, ?)", (job.id, json.dumps(job.snapshot()), now))
+                db.executemany(
+                    "INSERT OR REPLACE INTO job_items VALUES (?, ?, ?)",
+                    [(job.id, job.persisted_items + i, json.dumps(item)) for i, item in enumerate(items)]
+                )
+                if now - self._last_cleanup >= CLEANUP_INTERVAL:
+                    cutoff = now - self.retention
+                    db.execute("DELETE FROM job_items WHERE job_id IN (SELECT id FROM jobs WHERE updated_at < ?)",
+                               (cutoff,))
+                    db.execute("DELETE FROM jobs WHERE updated_at < ?", (cutoff,))
+                    self._last_cleanup = now
+                db.commit()
+                job.persisted_at = now
+                job.persisted_items += len(items)
+        except sqlite3.Error as e:
+            logger.error(f"Error persisting job {job.id}: {str(e)}")
+
+    def _get_executor(self):
+        # Created lazily so each forked worker process gets its own threads.
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        return self._executor
+
+    def submit(self, key, *args):
+        """Queue runner(job, *args); returns (job, deduplicated)."""
+        with self._lock:
+            self._expire()
+
+            job = self._in_flight.get(key)
+            if job is not None:
+                return job, True
+
+            if len(self._in_flight) >= self.max_workers + self.max_queue:
+                raise QueueFullError("Too many analyses in progress, please retry later")
+
+            job = Job(key, on_change=self._persist)
+            self._jobs[job.id] = job
+            self._in_flight[key] = job
+
+        # Written before the job can start, so the queued state never overwrites a later one.
+        self._persist(job)
+        with self._lock:
+            self._get_executor().submit(self._run, job, args)
+        return job, False
+
+    def store(self, result):
+        """Record an already computed result as a finished job, so it can be fetched by id later."""
+        job = Job(key=None, on_change=self._persist)
+        with self._lock:
+            self._expire()
+            self._jobs[job.id] = job
+        job.finish(result)
+        return job
+
+    def _run(self, job, args):
+        """Run one job and record its outcome."""
+        job.start()
+        try:
+            job.finish(self.runner(job, *args))
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {str(e)}", exc_info=True)
+            metrics.ERRORS.inc(stage="job")
+            job.fail(str(e))
+        finally:
+            with self._lock:
+                self._in_flight.pop(job.key, None)
+
+    def _expire(self):
+        """Forget finished jobs older than the retention period."""
+        cutoff = time.time() - self.retention
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """Return a job by id, or None; jobs run by other processes are read from the shared table."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None or not self.db_path:
+            return job
+
+        with self._db_lock:
+            db = self._db.connect()
+            row = db.execute("SELECT snapshot FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            items = db.execute(
+                "SELECT item FROM job_items WHERE job_id = ? ORDER BY position", (job_id,)
+            ).fetchall() if row else []
+        if row is None:
+            return None
+        return Job.from_snapshot({**json.loads(row[0]), "partial_results": [json.loads(item) for (item,) in items]})
+
+    def stats(self):
+        """Return counts of jobs by status."""
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {"in_flight": len(self._in_flight), "max_in_flight": self.max_workers + self.max_queue, **counts}
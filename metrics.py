@@ -0,0 +1,246 @@
+from contextlib import contextmanager
+import bisect
+import threading
+import time
+import os
+
+# Seconds; covers sub-millisecond tokenization up to multi-minute scrapes.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels."""
+
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        """Add amount to the series for labels."""
+        if not ENABLED:
+            return
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, _format_labels(self.labelnames, key), value) for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    """Bucketed distribution of observed values, optionally split by labels."""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        """Record one observation in the series for labels."""
+        if not ENABLED:
+            return
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), sum.
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else _format_value(bound)
+                    samples.append((f"{self.name}_bucket", _format_labels(self.labelnames, key, [("le", le)]), cumulative))
+                samples.append((f"{self.name}_sum", _format_labels(self.labelnames, key), total))
+                samples.append((f"{self.name}_count", _format_labels(self.labelnames, key), cumulative))
+        return samples
+
+
+class Gauge:
+    """Value read from a callback when metrics are rendered."""
+
+    type = "gauge"
+
+    def __init__(self, name, documentation, function):
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+
+    def samples(self):
+        return [(self.name, "", self.function())]
+
+
+class Registry:
+    """Collection of metrics rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Add a metric; a metric with the same name replaces the earlier one."""
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """Return every metric as Prometheus text."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "review_analyzer_stage_seconds", "Time spent in each processing stage", ["stage"]
+))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "review_analyzer_request_seconds", "End-to-end request latency", ["endpoint"]
+))
+REQUESTS = REGISTRY.register(Counter(
+    "review_analyzer_requests_total", "Requests handled, by endpoint and HTTP status", ["endpoint", "status"]
+))
+REVIEWS = REGISTRY.register(Counter(
+    "review_analyzer_reviews_total", "Reviews scored, by whether the prediction was confident", ["outcome"]
+))
+BATCH_SIZE = REGISTRY.register(Histogram(
+    "review_analyzer_batch_size", "Texts per model forward pass", buckets=BATCH_SIZE_BUCKETS
+))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "review_analyzer_cache_lookups_total", "Prediction cache lookups, by result", ["result"]
+))
+DUPLICATES = REGISTRY.register(Counter(
+    "review_analyzer_duplicates_total", "Reviews answered from a duplicate's prediction, by kind", ["kind"]
+))
+ERRORS = REGISTRY.register(Counter(
+    "review_analyzer_errors_total", "Errors, by stage", ["stage"]
+))
+
+# Per-request stage breakdowns the current thread's spans are recorded into.
+_request = threading.local()
+_timings_lock = threading.Lock()
+
+
+@contextmanager
+def span(stage):
+    """
+    Time a block as one occurrence of stage
+    The duration feeds review_analyzer_stage_seconds and every request breakdown
+    the current thread is collecting (see collect_timings).
+    """
+    if not ENABLED:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        targets = getattr(_request, "timings", ())
+        if targets:
+            with _timings_lock:
+                for timings in targets:
+                    timings[stage] = timings.get(stage, 0.0) + elapsed
+
+
+@contextmanager
+def collect_timings(*into):
+    """
+    Collect the spans run on this thread into a {stage: seconds} dict, yielded to the caller
+    Given request breakdowns (see current_timings), spans are recorded into those
+    instead, so work done on a worker thread counts toward the requests it serves.
+    """
+    timings = into[0] if into else {}
+    previous = getattr(_request, "timings", ())
+    _request.timings = into or (timings,)
+    try:
+        yield timings
+    finally:
+        _request.timings = previous
+
+
+def snapshot_timings(timings):
+    """Copy of a breakdown that spans on other threads may still be adding to."""
+    with _timings_lock:
+        return dict(timings)
+
+
+def current_timings():
+    """The request breakdowns the current thread is collecting into, for handing to another thread."""
+    return getattr(_request, "timings", ())
+
+
+def propagate(function):
+    """Wrap function so spans it runs on another thread count toward the calling thread's breakdowns."""
+    targets = current_timings()
+    if not targets:
+        return function
+
+    def run(*args, **kwargs):
+        with collect_timings(*targets):
+            return function(*args, **kwargs)
+    return run
+
+
+def timed_iter(iterable, stage):
+    """Yield from iterable, timing each wait for the next item as a span of stage."""
+    iterator = iter(iterable)
+    done = object()
+    try:
+        while True:
+            with span(stage):
+                item = next(iterator, done)
+            if item is done:
+                return
+            yield item
+    finally:
+        if hasattr(iterator, "close"):
+            iterator.close()
+
+
+def render():
+    """Return this process's metrics as Prometheus text."""
+    return REGISTRY.render()
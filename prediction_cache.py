@@ -0,0 +1,169 @@
+from collections import OrderedDict
+from sqlite_store import SQLiteConnection
+import numpy as np
+import metrics
+import hashlib
+import sqlite3
+import sys
+import threading
+import logging
+import os
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement.
+SQLITE_CHUNK_SIZE = 500
+
+SCHEMA = ("CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, probabilities BLOB NOT NULL)",)
+
+# Bytes per in-memory entry beyond its key and array: the OrderedDict slot and link.
+# With the 64-character key and 5-float array an entry takes about 320 bytes.
+ENTRY_OVERHEAD = 72
+
+def model_fingerprint(model_path):
+    """Fingerprint a model directory from its file names, sizes and modification times"""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(model_path):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            digest.update(os.path.relpath(path, model_path).encode("utf-8"))
+            digest.update(f":{stat.st_size}:{stat.st_mtime_ns};".encode("utf-8"))
+    return digest.hexdigest()
+
+class PredictionCache:
+    """
+    Two-tier cache of probability distributions keyed by preprocessed text.
+
+    Tier one is an in-memory LRU bounded by max_memory_bytes; tier two is an
+    on-disk SQLite table. Keys include a fingerprint of the model directory, so
+    retraining the model invalidates old entries automatically.
+    """
+
+    def __init__(self, model_path="./sentiment_model_finetuned", db_path="prediction_cache.sqlite3",
+                 max_memory_bytes=16 * 2 ** 20, variant=""):
+        # The variant (e.g. inference backend) is part of the fingerprint, since
+        # backends of the same model produce slightly different probabilities.
+        self.fingerprint = hashlib.sha256(
+            f"{model_fingerprint(model_path)}:{variant}".encode("utf-8")
+        ).hexdigest()
+        self.max_memory_bytes = max_memory_bytes
+
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.db_path = db_path
+        self._db = SQLiteConnection(db_path, SCHEMA)
+        self._db.connect()
+
+        logger.info(f"Prediction cache ready (model fingerprint {self.fingerprint[:12]})")
+
+    def key(self, text):
+        """Content address of a preprocessed text under the current model"""
+        return hashlib.sha256(f"{self.fingerprint}\0{text}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _entry_size(key, probabilities):
+        """Approximate memory held by one in-memory entry"""
+        return sys.getsizeof(key) + sys.getsizeof(probabilities) + ENTRY_OVERHEAD
+
+    def _remember(self, key, probabilities):
+        """Insert into the in-memory LRU, evicting the least recently used entries"""
+        # Copy so the entry doesn't keep a whole batch's probability array alive.
+        probabilities = np.array(probabilities, dtype=np.float32)
+        if key in self._memory:
+            self._memory_bytes -= self._entry_size(key, self._memory[key])
+        self._memory[key] = probabilities
+        self._memory.move_to_end(key)
+        self._memory_bytes += self._entry_size(key, probabilities)
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            evicted_key, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= self._entry_size(evicted_key, evicted)
+
+    def get_many(self, texts):
+        """Return cached probabilities for each preprocessed text, or None on a miss"""
+        keys = [self.key(text) for text in texts]
+        results = [None] * len(keys)
+        memory_hits = disk_hits = 0
+
+        with self._lock:
+            disk_lookups = {}
+            for i, key in enumerate(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    results[i] = self._memory[key]
+                    memory_hits += 1
+                else:
+                    disk_lookups.setdefault(key, []).append(i)
+
+            db = self._db.connect()
+            if disk_lookups and db is not None:
+                pending = list(disk_lookups)
+                for start in range(0, len(pending), SQLITE_CHUNK_SIZE):
+                    chunk = pending[start:start + SQLITE_CHUNK_SIZE]
+                    rows = db.execute(
+                        f"SELECT key, probabilities FROM predictions WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk
+                    ).fetchall()
+                    for key, blob in rows:
+                        probabilities = np.frombuffer(blob, dtype=np.float32)
+                        self._remember(key, probabilities)
+                        for i in disk_lookups.pop(key):
+                            results[i] = probabilities
+                            disk_hits += 1
+
+            misses = sum(len(indices) for indices in disk_lookups.values())
+            self.memory_hits += memory_hits
+            self.disk_hits += disk_hits
+            self.misses += misses
+
+        metrics.CACHE_LOOKUPS.inc(memory_hits, result="memory_hit")
+        metrics.CACHE_LOOKUPS.inc(disk_hits, result="disk_hit")
+        metrics.CACHE_LOOKUPS.inc(misses, result="miss")
+        return results
+
+    def put_many(self, items):
+        """Store (preprocessed text, probabilities) pairs in both tiers"""
+        rows = []
+        with self._lock:
+            for text, probabilities in items:
+                key = self.key(text)
+                probabilities = np.asarray(probabilities, dtype=np.float32)
+                self._remember(key, probabilities)
+                rows.append((key, probabilities.tobytes()))
+
+            db = self._db.connect()
+            if rows and db is not None:
+                try:
+                    db.executemany("INSERT OR REPLACE INTO predictions VALUES (?, ?)", rows)
+                    db.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Error writing prediction cache: {str(e)}")
+
+    def get(self, text):
+        """Return cached probabilities for a single preprocessed text, or None"""
+        return self.get_many([text])[0]
+
+    def put(self, text, probabilities):
+        """Store probabilities for a single preprocessed text"""
+        self.put_many([(text, probabilities)])
+
+    def stats(self):
+        """Return hit/miss counters and tier sizes"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+            }
@@ -1,90 +1,135 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from datasets import load_dataset
 from sklearn.model_selection import train_test_split
 import logging
 import os
+import re
 import numpy as np
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def convert_binary_to_five_scale(row):
-    """Convert binary sentiment to 5-scale rating using content analysis"""
-    # Base rating from sentiment (1 or 5).
-    base_rating = 5 if row['label'] == 1 else 1
-    
-    # Analyze review content for rating refinement.
-    text = row['content'].lower()
-    
-    if row['label'] == 1:  # Positive reviews.
-        if any(phrase in text for phrase in ['amazing', 'excellent', 'perfect', 'best']):
-            return 5
-        elif any(phrase in text for phrase in ['good but', 'okay', 'decent']):
-            return 4
-        return 4
-    else:  # Negative reviews.
-        if any(phrase in text for phrase in ['terrible', 'worst', 'awful']):
-            return 1
-        elif any(phrase in text for phrase in ['disappointing', 'mediocre']):
-            return 2
-        return 2
-
-def download_and_prepare_data(sample_size=None):
+# Phrases that push a review to the extreme rating of its polarity.
+STRONG_POSITIVE_PHRASES = ['amazing', 'excellent', 'perfect', 'best']
+STRONG_NEGATIVE_PHRASES = ['terrible', 'worst', 'awful']
+
+STRONG_POSITIVE_PATTERN = "|".join(re.escape(phrase) for phrase in STRONG_POSITIVE_PHRASES)
+STRONG_NEGATIVE_PATTERN = "|".join(re.escape(phrase) for phrase in STRONG_NEGATIVE_PHRASES)
+
+CHUNK_SIZE = 100000
+SHARD_ROWS = 1000000
+
+def convert_binary_to_five_scale_vectorized(labels, texts):
+    """
+    Convert binary sentiment to 5-scale ratings over whole columns using content analysis
+    Positive reviews are 5 with a strong positive phrase and 4 otherwise;
+    negative reviews are 1 with a strong negative phrase and 2 otherwise.
+    """
+    lowered = texts.str.lower()
+    positive = labels.to_numpy() == 1
+    strong_positive = lowered.str.contains(STRONG_POSITIVE_PATTERN, regex=True).to_numpy()
+    strong_negative = lowered.str.contains(STRONG_NEGATIVE_PATTERN, regex=True).to_numpy()
+    return np.where(positive, np.where(strong_positive, 5, 4), np.where(strong_negative, 1, 2))
+
+def sample_split(split, sample_size):
+    """
+    Select sample_size rows before any processing
+    Uses the same RandomState draw as DataFrame.sample(random_state=42), so the
+    sampled rows match those of the previous whole-frame implementation.
+    """
+    if not sample_size or sample_size >= len(split):
+        return split
+    indices = np.random.RandomState(42).choice(len(split), size=sample_size, replace=False)
+    return split.select(indices)
+
+def iter_prepared_chunks(split, chunk_size=CHUNK_SIZE):
+    """Yield (review_text, rating) DataFrames of at most chunk_size rows."""
+    for batch in split.iter(batch_size=chunk_size):
+        texts = pd.Series(batch['content'], dtype=object).fillna('').astype(str)
+        labels = pd.Series(batch['label'])
+        yield pd.DataFrame({
+            'review_text': texts,
+            'rating': convert_binary_to_five_scale_vectorized(labels, texts)
+        })
+
+def write_split(split, name, chunk_size=CHUNK_SIZE, shard_rows=SHARD_ROWS):
+    """
+    Stream one split to data/amazon_reviews_<name>.csv and zstd Parquet shards
+    Only one chunk is held in memory at a time. Parquet output rolls over to a
+    new data/amazon_reviews_<name>-NNNNN.parquet file every shard_rows rows.
+    Returns (rating counts, first review text per rating).
+    """
+    csv_path = f'data/amazon_reviews_{name}.csv'
+    rating_counts = pd.Series(dtype='int64')
+    samples = {}
+    writer = None
+    shard = 0
+    shard_written = 0
+
+    try:
+        for index, chunk in enumerate(iter_prepared_chunks(split, chunk_size)):
+            chunk.to_csv(csv_path, mode='w' if index == 0 else 'a', header=index == 0, index=False)
+
+            if writer is None or shard_written >= shard_rows:
+                if writer is not None:
+                    writer.close()
+                    shard += 1
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                writer = pq.ParquetWriter(f'data/amazon_reviews_{name}-{shard:05d}.parquet', table.schema, compression='zstd')
+                shard_written = 0
+            else:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+            writer.write_table(table)
+            shard_written += len(chunk)
+
+            rating_counts = rating_counts.add(chunk['rating'].value_counts(), fill_value=0)
+            for rating, text in chunk.groupby('rating')['review_text'].first().items():
+                samples.setdefault(rating, text)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return rating_counts.astype(int).sort_index(), samples
+
+def download_and_prepare_data(sample_size=None, chunk_size=CHUNK_SIZE):
     """
     Download and prepare Amazon reviews dataset using amazon_polarity.
-    
+    Splits are sampled first, then labeled and written chunk by chunk, so memory
+    stays bounded by chunk_size even for the full dataset.
     """
     logger.info("Loading Amazon Polarity dataset...")
     dataset = load_dataset("amazon_polarity", trust_remote_code=True)
-    
-    # Convert to DataFrame.
-    train_data = dataset['train'].to_pandas()
-    test_data = dataset['test'].to_pandas()
-    
-    # Create new DataFrames with all needed columns.
-    train_df = pd.DataFrame()
-    test_df = pd.DataFrame()
-    
-    logger.info("Converting binary ratings to 5-scale ratings...")
-    
-    # Process training data.
-    train_df['review_text'] = train_data['content'].fillna('').astype(str)
-    train_df['rating'] = train_data.apply(convert_binary_to_five_scale, axis=1)
-    
-    # Process test data.
-    test_df['review_text'] = test_data['content'].fillna('').astype(str)
-    test_df['rating'] = test_data.apply(convert_binary_to_five_scale, axis=1)
-    
+
     # Take a sample if specified (useful for testing).
-    if sample_size:
-        train_df = train_df.sample(min(sample_size, len(train_df)), random_state=42)
-        test_df = test_df.sample(min(sample_size//5, len(test_df)), random_state=42)
-    
-    logger.info(f"Train set size: {len(train_df)}")
-    logger.info(f"Test set size: {len(test_df)}")
-    
+    train_split = sample_split(dataset['train'], sample_size)
+    test_split = sample_split(dataset['test'], sample_size//5 if sample_size else None)
+
+    logger.info(f"Train set size: {len(train_split)}")
+    logger.info(f"Test set size: {len(test_split)}")
+
     # Create data directory if it doesn't exist.
     os.makedirs('data', exist_ok=True)
-    
-    # Save to CSV.
-    train_df.to_csv('data/amazon_reviews_train.csv', index=False)
-    test_df.to_csv('data/amazon_reviews_test.csv', index=False)
-    
-    logger.info("Data saved to data/amazon_reviews_train.csv and data/amazon_reviews_test.csv")
-    
+
+    logger.info("Converting binary ratings to 5-scale ratings...")
+    train_counts, train_samples = write_split(train_split, 'train', chunk_size)
+    test_counts, _ = write_split(test_split, 'test', chunk_size)
+
+    logger.info("Data saved to data/amazon_reviews_{train,test}.csv and data/amazon_reviews_{train,test}-*.parquet")
+
     # Print some statistics.
     logger.info("\nRating distribution in training set:")
-    print(train_df['rating'].value_counts().sort_index())
-    
+    print(train_counts)
+
     # Print sample reviews for each rating.
     logger.info("\nSample reviews for each rating:")
-    for rating in sorted(train_df['rating'].unique()):
-        sample_review = train_df[train_df['rating'] == rating]['review_text'].iloc[0][:100]
+    for rating in sorted(train_samples):
         print(f"\nRating {rating}:")
-        print(sample_review + "...")
-    
-    return train_df, test_df
+        print(train_samples[rating][:100] + "...")
+
+    return train_counts, test_counts
 
 if __name__ == "__main__":
     # Download and prepare data.
-    train_df, test_df = download_and_prepare_data(sample_size=10000)  # Remove sample_size for full dataset
\ No newline at end of file
+    train_counts, test_counts = download_and_prepare_data(sample_size=10000)  # Remove sample_size for full dataset
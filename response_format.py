@@ -0,0 +1,139 @@
+from flask import Response, request
+import base64
+import gzip
+import json
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+REVIEW_FIELDS = ("review_text", "predicted_rating", "confidence", "probabilities")
+LAYOUTS = ("rows", "columns")
+
+MSGPACK_MIMETYPES = ("application/msgpack", "application/x-msgpack")
+
+# Bodies smaller than this are not worth the CPU of compressing.
+MIN_COMPRESS_BYTES = 1024
+COMPRESS_LEVEL = 5
+
+
+class InvalidFormatError(ValueError):
+    """Raised for malformed fields, layout, cursor or limit options."""
+
+
+def parse_fields(value):
+    """
+    Parse a review field selector: a comma-separated string or a list
+    None selects every field; an empty selector drops analyzed_reviews entirely,
+    leaving only the summary.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = [name.strip() for name in value.split(",") if name.strip()]
+    elif not isinstance(value, list) or not all(isinstance(name, str) for name in value):
+        raise InvalidFormatError("fields must be a comma-separated string or a list of strings")
+    unknown = [name for name in value if name not in REVIEW_FIELDS]
+    if unknown:
+        raise InvalidFormatError(f"Unknown fields {unknown}, expected some of {list(REVIEW_FIELDS)}")
+    return tuple(name for name in REVIEW_FIELDS if name in value)
+
+
+def encode_cursor(offset):
+    """Opaque cursor for the review at offset."""
+    return base64.urlsafe_b64encode(f"o:{offset}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; None or an empty cursor means the start."""
+    if not cursor:
+        return 0
+    try:
+        decoded = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, offset = decoded.split(":", 1)
+        if prefix != "o" or int(offset) < 0:
+            raise ValueError
+        return int(offset)
+    except (TypeError, ValueError):
+        raise InvalidFormatError("Invalid cursor")
+
+
+def response_options(source):
+    """Read fields, layout, cursor and limit from a request body or query-string mapping."""
+    layout = source.get("layout", "rows")
+    if layout not in LAYOUTS:
+        raise InvalidFormatError(f"Unknown layout '{layout}', expected one of {list(LAYOUTS)}")
+
+    limit = source.get("limit")
+    try:
+        limit = int(limit) if limit not in (None, "") else None
+    except (TypeError, ValueError):
+        raise InvalidFormatError("limit must be an integer")
+    if limit is not None and limit < 1:
+        raise InvalidFormatError("limit must be positive")
+
+    return {
+        "fields": parse_fields(source.get("fields")),
+        "layout": layout,
+        "offset": decode_cursor(source.get("cursor")),
+        "limit": limit
+    }
+
+
+def select_fields(reviews, fields=None):
+    """Keep only the selected fields of each analyzed_reviews entry."""
+    if fields is None:
+        return reviews
+    return [{name: review[name] for name in fields} for review in reviews]
+
+
+def to_columns(reviews, fields=None):
+    """Turn analyzed_reviews entries into {field: [values]}."""
+    fields = REVIEW_FIELDS if fields is None else fields
+    return {name: [review[name] for review in reviews] for name in fields}
+
+
+def shape_result(result, fields=None, layout="rows", offset=0, limit=None):
+    """
+    Apply response options to an /analyze result
+    Returns a new dict with analyzed_reviews restricted to the selected fields,
+    laid out as rows or columns, and paged from offset; next_cursor is set
+    when more reviews follow.
+    """
+    shaped = {key: value for key, value in result.items() if key != "analyzed_reviews"}
+    if fields == ():
+        return shaped
+
+    reviews = result.get("analyzed_reviews", [])
+    end = len(reviews) if limit is None else min(len(reviews), offset + limit)
+    page = reviews[offset:end]
+
+    shaped["analyzed_reviews"] = to_columns(page, fields) if layout == "columns" else select_fields(page, fields)
+    if offset or end < len(reviews):
+        shaped["next_cursor"] = encode_cursor(end) if end < len(reviews) else None
+    return shaped
+
+
+def encode_response(body, status=200, headers=None):
+    """
+    Serialize body for the current request
+    MessagePack is used when the client accepts it and msgpack is installed,
+    compact JSON otherwise; the result is gzip-compressed when the client
+    accepts gzip and the body is large enough to benefit.
+    """
+    accept = request.accept_mimetypes
+    if msgpack is not None and any(accept.quality(mimetype) > accept.quality("application/json")
+                                   for mimetype in MSGPACK_MIMETYPES):
+        data = msgpack.packb(body, use_bin_type=True)
+        mimetype = MSGPACK_MIMETYPES[0]
+    else:
+        data = json.dumps(body, separators=(",", ":")).encode("utf-8")
+        mimetype = "application/json"
+
+    response = Response(data, status=status, mimetype=mimetype, headers=headers)
+    response.vary.update(("Accept", "Accept-Encoding"))
+    if len(data) >= MIN_COMPRESS_BYTES and request.accept_encodings.quality("gzip") > 0:
+        response.set_data(gzip.compress(data, compresslevel=COMPRESS_LEVEL))
+        response.headers["Content-Encoding"] = "gzip"
+    return response
@@ -4,12 +4,22 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
+from concurrent.futures import ThreadPoolExecutor, Future
+from http_scrape import get_http_scraper, BlockedPageError
+from scrape_cache import get_scrape_cache, product_key, newest_first_url
+import metrics
 import pickle
+import atexit
 import os
+import queue
+import threading
 import time
 import csv
 
+REVIEW_BODY_SELECTOR = "span[data-hook='review-body']"
+
 def save_cookies(driver, cookies_file):
     """Save cookies to a file."""
     try:
@@ -92,68 +102,362 @@ def login_to_amazon(driver):
 
 
 
-def scrape_amazon_reviews(product_url, num_pages=5, cookies_file="cookies.pkl"):
+def page_url(product_url, page):
+    """Construct the URL for a given review page."""
+    if page == 1:
+        return product_url
+    return product_url.replace(
+        "ref=cm_cr_arp_d_viewopt_srt",
+        f"ref=cm_cr_arp_d_paging_btm_next_{page}"
+    ).replace("pageNumber=1", f"pageNumber={page}")
+
+
+def chrome_options():
+    """Chrome options used for every scraping driver."""
     options = Options()
     options.add_argument("--disable-gpu")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+    return options
 
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    reviews = []
 
-    try:
-        # Load cookies or log in
-        if os.path.exists(cookies_file):
-            driver.get("https://www.amazon.com")
-            load_cookies(driver, cookies_file, ".amazon.com")
-            driver.refresh()
-            time.sleep(5)
-            print("Cookies loaded successfully.")
-            if "ap/signin" in driver.current_url:
-                print("Session invalid. Reattempting login.")
-                login_to_amazon(driver)
-                save_cookies(driver, cookies_file)
-        else:
+def authenticate(driver, cookies_file):
+    """Load cookies or log in so the driver has an authenticated Amazon session."""
+    if os.path.exists(cookies_file):
+        driver.get("https://www.amazon.com")
+        load_cookies(driver, cookies_file, ".amazon.com")
+        driver.refresh()
+        WebDriverWait(driver, 15).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+        print("Cookies loaded successfully.")
+        if "ap/signin" in driver.current_url:
+            print("Session invalid. Reattempting login.")
             login_to_amazon(driver)
             save_cookies(driver, cookies_file)
-            print("Cookies saved successfully.")
+    else:
+        login_to_amazon(driver)
+        save_cookies(driver, cookies_file)
+        print("Cookies saved successfully.")
+
 
+class DriverPool:
+    """
+    Bounded pool of pre-launched, already-authenticated Chrome drivers.
+
+    Scrapes check a driver out and return it when done, so Chrome startup,
+    driver resolution and login happen once per driver instead of per scrape.
+    Drivers are health-checked on checkout and recycled after max_uses
+    scrapes or when a scrape fails.
+    """
+
+    def __init__(self, size=2, max_uses=50, cookies_file="cookies.pkl"):
+        self.size = size
+        self.max_uses = max_uses
+        self.cookies_file = cookies_file
+
+        # Resolve the driver binary once instead of on every scrape.
+        self.driver_path = ChromeDriverManager().install()
+
+        self._idle = queue.LifoQueue()  # LIFO keeps the most recently used drivers warm.
+        self._uses = {}
+        self._lock = threading.Lock()
+        self._total = 0
+        self._recycled = 0
+        self._closed = False
+
+    def _reserve(self):
+        """Reserve capacity for one more driver; returns False if the pool is full."""
+        with self._lock:
+            if self._closed or self._total >= self.size:
+                return False
+            self._total += 1
+            return True
+
+    def _launch(self):
+        """Start and authenticate a new driver in a reserved slot."""
+        try:
+            with metrics.span("chrome_launch"):
+                driver = webdriver.Chrome(service=Service(self.driver_path), options=chrome_options())
+        except Exception:
+            metrics.ERRORS.inc(stage="chrome_launch")
+            with self._lock:
+                self._total -= 1
+            raise
+
+        try:
+            with metrics.span("authenticate"):
+                authenticate(driver, self.cookies_file)
+        except Exception:
+            metrics.ERRORS.inc(stage="authenticate")
+            self._discard(driver)
+            raise
+
+        self._uses[driver] = 0
+        print("Launched a new scraping driver.")
+        return driver
+
+    def _discard(self, driver):
+        """Quit a driver and free its slot."""
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"Error quitting driver: {e}")
+        with self._lock:
+            self._uses.pop(driver, None)
+            self._total -= 1
+            self._recycled += 1
+
+    def _is_healthy(self, driver):
+        """Check that the browser still responds."""
+        try:
+            driver.execute_script("return 1;")
+            return True
+        except Exception:
+            return False
+
+    def warm(self):
+        """Pre-launch drivers until the pool is full."""
+        while self._reserve():
+            self._idle.put(self._launch())
+
+    def checkout(self, timeout=120):
+        """Take a healthy driver from the pool, launching one if there is spare capacity."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                if self._reserve():
+                    return self._launch()
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError("No scraping driver available")
+                try:
+                    # Wake up periodically in case a slot was freed by a discard.
+                    driver = self._idle.get(timeout=min(1.0, remaining))
+                except queue.Empty:
+                    continue
+
+            if self._is_healthy(driver):
+                return driver
+            print("Discarding unresponsive driver.")
+            self._discard(driver)
+
+    def checkin(self, driver, healthy=True):
+        """Return a driver to the pool, recycling it if it failed or is worn out."""
+        uses = self._uses.get(driver, 0) + 1
+        if not healthy or uses >= self.max_uses or self._closed:
+            self._discard(driver)
+            return
+
+        self._uses[driver] = uses
+        self._idle.put(driver)
+
+    def close(self):
+        """Quit every idle driver and stop handing out new ones."""
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+    def stats(self):
+        """Return pool occupancy counters."""
+        with self._lock:
+            return {
+                "size": self.size,
+                "drivers": self._total,
+                "idle": self._idle.qsize(),
+                "recycled": self._recycled
+            }
+
+
+_driver_pool = None
+_driver_pool_pid = None
+_driver_pool_lock = threading.Lock()
+
+
+def get_driver_pool(cookies_file="cookies.pkl"):
+    """Return this process's driver pool, creating it on first use."""
+    global _driver_pool, _driver_pool_pid
+
+    with _driver_pool_lock:
+        # Browsers can't be shared with forked workers, so each process gets its own pool.
+        if _driver_pool is None or _driver_pool_pid != os.getpid():
+            _driver_pool = DriverPool(
+                size=int(os.getenv("SCRAPER_POOL_SIZE", "3")),
+                max_uses=int(os.getenv("SCRAPER_DRIVER_MAX_USES", "50")),
+                cookies_file=cookies_file
+            )
+            _driver_pool_pid = os.getpid()
+            atexit.register(_driver_pool.close)
+        return _driver_pool
+
+
+def warm_scrapers(cookies_file="cookies.pkl"):
+    """Prepare the configured scraping engine before the first request."""
+    if os.getenv("SCRAPER_ENGINE", "http") == "selenium":
+        get_driver_pool(cookies_file).warm()
+    else:
+        # Browsers are only launched on demand as a fallback.
+        get_http_scraper(cookies_file)
+
+
+def fetch_review_page(driver, url, timeout=10, retries=1):
+    """
+    Load a review page and return its review texts, waiting for the review bodies instead of sleeping.
+    A page that finished loading without review bodies is past the last review and
+    returns []. A page still loading after timeout is reloaded up to retries times,
+    then TimeoutException is raised, so a slow page doesn't end pagination as if
+    there were no more reviews.
+    """
+    for attempt in range(retries + 1):
+        driver.get(url)
+        try:
+            WebDriverWait(driver, timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, REVIEW_BODY_SELECTOR))
+            )
+            break
+        except TimeoutException:
+            if driver.execute_script("return document.readyState") == "complete":
+                break
+            if attempt == retries:
+                raise
+            print(f"Timed out waiting for reviews on {url}, reloading.")
+
+    # Scroll to the bottom so content loaded lazily below the fold is rendered.
+    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+    WebDriverWait(driver, timeout).until(
+        lambda d: d.execute_script("return document.readyState") == "complete"
+    )
+
+    review_elements = driver.find_elements(By.CSS_SELECTOR, REVIEW_BODY_SELECTOR)
+    return [element.text.strip() for element in review_elements]
+
+
+def scrape_page_with_driver(pool, url, timeout=10):
+    """Scrape one review page with a driver checked out of the pool."""
+    with metrics.span("driver_checkout"):
+        driver = pool.checkout()
+    healthy = True
+
+    try:
+        with metrics.span("page_load_selenium"):
+            return fetch_review_page(driver, url, timeout)
+    except Exception:
+        healthy = False
+        try:
+            driver.save_screenshot("error_screenshot.png")
+        except Exception:
+            pass
+        raise
+    finally:
+        pool.checkin(driver, healthy=healthy)
+
+
+def scrape_page(product_url, page, cookies_file="cookies.pkl", timeout=10, engine="http"):
+    """
+    Scrape one review page.
+    The http engine is tried first; the browser is only used for login walls
+    and captchas, or when engine="selenium".
+    """
+    url = page_url(product_url, page)
+    print(f"Navigating to page {page}: {url}")
+
+    if engine == "http":
+        try:
+            with metrics.span("page_load_http"):
+                return get_http_scraper(cookies_file).fetch_page(url)
+        except BlockedPageError as e:
+            metrics.ERRORS.inc(stage="page_blocked")
+            print(f"HTTP scrape of page {page} blocked ({e}), falling back to browser.")
+
+    return scrape_page_with_driver(get_driver_pool(cookies_file), url, timeout)
+
+
+def iter_review_pages(product_url, num_pages=5, cookies_file="cookies.pkl", concurrency=None, page_timeout=None,
+                      engine=None, incremental=False):
+    """
+    Scrape review pages, yielding (page, reviews) in page order as soon as each page is ready.
+    Up to `concurrency` pages are fetched at once; scraping stops at the first page
+    without reviews. engine is "http" (default, browser fallback) or "selenium".
+    Pages are served from the per-ASIN scrape cache while fresh. With incremental=True,
+    reviews are walked newest-first and scraping stops at the first already-known
+    review; the rest of the listing is filled in from previously scraped reviews.
+    """
+    engine = engine or os.getenv("SCRAPER_ENGINE", "http")
+    concurrency = concurrency or int(os.getenv("SCRAPER_CONCURRENCY", "3"))
+    page_timeout = page_timeout or float(os.getenv("SCRAPER_PAGE_TIMEOUT", "10"))
+
+    if incremental:
+        product_url = newest_first_url(product_url)
+        concurrency = 1  # Usually only the first page is needed.
+
+    asin, params = product_key(product_url)
+    cache = get_scrape_cache() if asin else None
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, num_pages)), thread_name_prefix="scrape-page")
+    futures = {}
+    cached_pages = set()
+    yielded_reviews = []
+    next_page = 1
+
+    try:
         for page in range(1, num_pages + 1):
-            # Construct the URL for each page
-            if page == 1:
-                url = product_url
-            else:
-                url = product_url.replace(
-                    "ref=cm_cr_arp_d_viewopt_srt",
-                    f"ref=cm_cr_arp_d_paging_btm_next_{page}"
-                ).replace("pageNumber=1", f"pageNumber={page}")
-            
-            print(f"Navigating to page {page}: {url}")
-            driver.get(url)
-            time.sleep(5)
-
-            # Scroll to ensure all content loads
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(3)
-
-            # Extract reviews
-            review_elements = driver.find_elements(By.CSS_SELECTOR, "span[data-hook='review-body']")
-            if not review_elements:
+            # Keep up to `concurrency` pages in flight, starting with the one to yield next.
+            while next_page <= num_pages and next_page < page + concurrency:
+                cached = cache.get_page(asin, params, next_page) if cache else None
+                if cached is not None:
+                    print(f"Using cached page {next_page} for {asin}.")
+                    futures[next_page] = Future()
+                    futures[next_page].set_result(cached)
+                    cached_pages.add(next_page)
+                else:
+                    futures[next_page] = executor.submit(
+                        metrics.propagate(scrape_page), product_url, next_page, cookies_file, page_timeout, engine
+                    )
+                next_page += 1
+
+            page_reviews = futures.pop(page).result()
+            if not page_reviews:
                 print(f"No reviews found on page {page}.")
                 break
 
-            for element in review_elements:
-                reviews.append(element.text.strip())
-
-            print(f"Scraped {len(review_elements)} reviews from page {page}.")
+            reached_known = incremental and cache and any(cache.known_reviews(asin, params, page_reviews))
+            if cache and page not in cached_pages:
+                cache.put_page(asin, params, page, page_reviews)
+
+            print(f"Scraped {len(page_reviews)} reviews from page {page}.")
+            yielded_reviews.extend(page_reviews)
+            yield page, page_reviews
+
+            if reached_known:
+                # Everything older was scraped before; serve it from the cache.
+                limit = max(0, num_pages * len(page_reviews) - len(yielded_reviews))
+                stored = cache.stored_reviews(asin, params, exclude=yielded_reviews, limit=limit)
+                print(f"Reached previously scraped reviews; {len(stored)} more from cache.")
+                if stored:
+                    yield page + 1, stored
+                break
 
     except Exception as e:
+        metrics.ERRORS.inc(stage="scrape")
         print(f"Error during scraping: {e}")
-        driver.save_screenshot("error_screenshot.png")
     finally:
-        driver.quit()
+        # Pages past an empty page (or an error) are not needed.
+        for future in futures.values():
+            future.cancel()
+        executor.shutdown(wait=False)
+
 
+def scrape_amazon_reviews(product_url, num_pages=5, cookies_file="cookies.pkl", incremental=False):
+    reviews = []
+    for page, page_reviews in iter_review_pages(product_url, num_pages, cookies_file, incremental=incremental):
+        reviews.extend(page_reviews)
     return reviews
 
 
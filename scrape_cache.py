@@ -0,0 +1,147 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from sqlite_store import SQLiteConnection
+import hashlib
+import json
+import re
+import threading
+import time
+import os
+
+ASIN_PATTERN = re.compile(r"/(?:product-reviews|dp|gp/product)/([A-Z0-9]{10})")
+
+# Query parameters that don't change which reviews a page shows.
+IGNORED_PARAMS = {"pageNumber", "ref", "ie"}
+
+# Query parameters that only change the order of the listing.
+SORT_PARAMS = {"sortBy"}
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS pages ("
+    "asin TEXT, params TEXT, page INTEGER, reviews TEXT NOT NULL, fetched_at REAL NOT NULL, "
+    "PRIMARY KEY (asin, params, page))",
+    # Reviews used to be recorded per ASIN only; those rows can't be attributed to a filter.
+    "DROP TABLE IF EXISTS reviews",
+    "CREATE TABLE IF NOT EXISTS listing_reviews ("
+    "asin TEXT, filters TEXT, review_hash TEXT, review_text TEXT NOT NULL, first_seen REAL NOT NULL, "
+    "PRIMARY KEY (asin, filters, review_hash))"
+)
+
+
+def product_key(product_url):
+    """
+    Return (asin, params) identifying a product's review listing, or (None, None)
+    params is a canonical string of the sort/filter query parameters.
+    """
+    match = ASIN_PATTERN.search(product_url)
+    if not match:
+        return None, None
+
+    query = parse_qsl(urlsplit(product_url).query)
+    params = urlencode(sorted((k, v) for k, v in query if k not in IGNORED_PARAMS))
+    return match.group(1), params
+
+
+def filter_params(params):
+    """Drop sort parameters from canonical params; the rest select which reviews are listed."""
+    return urlencode([(k, v) for k, v in parse_qsl(params) if k not in SORT_PARAMS])
+
+
+def newest_first_url(product_url):
+    """Return the product URL with reviews sorted newest-first."""
+    parts = urlsplit(product_url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k != "sortBy"]
+    query.append(("sortBy", "recent"))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def review_hash(review_text):
+    """Identity of a scraped review."""
+    return hashlib.sha256(review_text.encode("utf-8")).hexdigest()
+
+
+class ScrapeCache:
+    """
+    SQLite cache of scraped review pages and of every review seen per listing.
+
+    Pages are keyed by ASIN, page number and sort/filter parameters and expire
+    after ttl seconds. Reviews are recorded per ASIN and filter parameters, so
+    incremental re-scraping of a filtered listing only relies on reviews that
+    listing showed before.
+    """
+
+    def __init__(self, db_path="scrape_cache.sqlite3", ttl=3600):
+        self.db_path = db_path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = SQLiteConnection(db_path, SCHEMA)
+
+    def get_page(self, asin, params, page):
+        """Return a cached page's reviews, or None if missing or older than the TTL."""
+        if not self.ttl:
+            return None
+        with self._lock:
+            row = self._db.connect().execute(
+                "SELECT reviews, fetched_at FROM pages WHERE asin = ? AND params = ? AND page = ?",
+                (asin, params, page)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return json.loads(row[0])
+
+    def put_page(self, asin, params, page, reviews):
+        """Cache a scraped page and record its reviews for the ASIN's filtered listing."""
+        filters = filter_params(params)
+        now = time.time()
+        with self._lock:
+            db = self._db.connect()
+            db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                (asin, params, page, json.dumps(reviews), now)
+            )
+            db.executemany(
+                "INSERT OR IGNORE INTO listing_reviews VALUES (?, ?, ?, ?, ?)",
+                [(asin, filters, review_hash(text), text, now) for text in reviews]
+            )
+            db.commit()
+
+    def known_reviews(self, asin, params, reviews):
+        """Return, per review, whether it was already seen in this ASIN's listing with the same filters."""
+        hashes = [review_hash(text) for text in reviews]
+        if not hashes:
+            return []
+        with self._lock:
+            rows = self._db.connect().execute(
+                "SELECT review_hash FROM listing_reviews WHERE asin = ? AND filters = ? "
+                f"AND review_hash IN ({','.join('?' * len(hashes))})",
+                [asin, filter_params(params)] + hashes
+            ).fetchall()
+        known = {row[0] for row in rows}
+        return [h in known for h in hashes]
+
+    def stored_reviews(self, asin, params, exclude=(), limit=None):
+        """Return reviews previously seen in this ASIN's listing with the same filters, newest first."""
+        exclude = set(exclude)
+        with self._lock:
+            rows = self._db.connect().execute(
+                "SELECT review_text FROM listing_reviews WHERE asin = ? AND filters = ? ORDER BY first_seen DESC, rowid",
+                (asin, filter_params(params))
+            ).fetchall()
+        reviews = [row[0] for row in rows if row[0] not in exclude]
+        return reviews[:limit] if limit is not None else reviews
+
+
+_scrape_cache = None
+_scrape_cache_lock = threading.Lock()
+
+
+def get_scrape_cache():
+    """Return the shared scrape cache, configured from the environment."""
+    global _scrape_cache
+
+    with _scrape_cache_lock:
+        if _scrape_cache is None:
+            _scrape_cache = ScrapeCache(
+                db_path=os.getenv("SCRAPE_CACHE_PATH", "scrape_cache.sqlite3"),
+                ttl=float(os.getenv("SCRAPE_CACHE_TTL", "3600"))
+            )
+        return _scrape_cache
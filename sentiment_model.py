@@ -1,38 +1,207 @@
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from transformers.utils import is_accelerate_available
 import torch
 import re
 import numpy as np
+import metrics
 import logging
+import threading
+import time
+import os
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+BACKENDS = ("pytorch", "quantized", "onnx")
+ONNX_MODEL_FILE = "model.onnx"
+SAFETENSORS_FILE = "model.safetensors"
+
+MAX_LENGTH = 512
+# How texts longer than MAX_LENGTH tokens are scored: keep the first tokens,
+# keep the head and tail, or average sliding windows over the whole text.
+LONG_TEXT_STRATEGIES = ("truncate", "head_tail", "sliding")
+HEAD_TOKENS = 128  # head_tail keeps this many leading tokens and fills the rest from the end.
+# Generous upper bound on characters per token, for clipping texts before tokenization.
+MAX_CHARS_PER_TOKEN = 10
+
+def preprocess_text(text):
+    """Preprocess the input text"""
+    text = str(text)  # Ensure text is string
+    text = re.sub(r"<.*?>", "", text)  # Remove HTML tags
+    text = re.sub(r'\s+', ' ', text)  # Normalize whitespace
+    text = re.sub(r'([!?.]){2,}', r'\1', text)  # Normalize repeated punctuation
+    text = re.sub(r':\)|:-\)', ' positive ', text)
+    text = re.sub(r':\(|:-\(', ' negative ', text)
+    text = re.sub(r"n't", " not", text)
+    return text.strip()
+
 class SentimentAnalyzer:
-    def __init__(self, model_path="./sentiment_model_finetuned"):
-        """Initialize the sentiment analyzer with the fine-tuned model"""
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        logger.info(f"Using device: {self.device}")
+    def __init__(self, model_path="./sentiment_model_finetuned", cache=None, backend="pytorch",
+                 cascade=None, cascade_threshold=0.9, long_text="truncate", max_chunks=4):
+        """
+        Initialize the sentiment analyzer with the fine-tuned model
+        cache: optional PredictionCache; only cache misses run through the model
+        backend: "pytorch" (eager), "quantized" (dynamic INT8 PyTorch, CPU) or
+        "onnx" (ONNX Runtime graph exported by export_model.py, CPU)
+        cascade: optional FastSentimentClassifier scoring texts first; only texts it
+        scores below cascade_threshold confidence go on to BERT
+        long_text: "truncate" (first 512 tokens), "head_tail" (first 128 and last 382
+        tokens) or "sliding" (up to max_chunks half-overlapping 512-token windows,
+        probabilities averaged by window length)
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+        if long_text not in LONG_TEXT_STRATEGIES:
+            raise ValueError(f"Unknown long_text strategy '{long_text}', expected one of {LONG_TEXT_STRATEGIES}")
+
+        self.model_path = model_path
+        self.cache = cache
+        self.backend = backend
+        self.cascade = cascade
+        self.cascade_threshold = cascade_threshold
+        self.long_text = long_text
+        self.max_chunks = max_chunks
+        self.cascade_counts = {"fast": 0, "bert": 0}
+        self._cascade_lock = threading.Lock()
+        if backend == "pytorch":
+            self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        else:
+            self.device = torch.device("cpu")  # Quantized and ONNX backends are CPU-only.
+        logger.info(f"Using device: {self.device}, backend: {backend}")
         
         try:
             self.tokenizer = AutoTokenizer.from_pretrained(model_path)
-            self.model = AutoModelForSequenceClassification.from_pretrained(model_path)
-            self.model.to(self.device)
-            self.model.eval()  # Set to evaluation mode
+            if backend == "onnx":
+                self._load_onnx_session(model_path)
+            else:
+                self.model = AutoModelForSequenceClassification.from_pretrained(
+                    model_path, **self._weight_loading_options(model_path)
+                )
+                if backend == "quantized":
+                    self.model = torch.quantization.quantize_dynamic(
+                        self.model, {torch.nn.Linear}, dtype=torch.qint8
+                    )
+                self.model.to(self.device)
+                self.model.eval()  # Set to evaluation mode
             logger.info("Model loaded successfully")
         except Exception as e:
             logger.error(f"Error loading model: {str(e)}")
             raise
 
+    @staticmethod
+    def _weight_loading_options(model_path):
+        """
+        from_pretrained options for fast weight loading
+        With accelerate installed, weights are created directly from the checkpoint
+        instead of being randomly initialised first; safetensors checkpoints are
+        read memory-mapped.
+        """
+        options = {}
+        # transformers refuses low_cpu_mem_usage without accelerate.
+        if is_accelerate_available():
+            options["low_cpu_mem_usage"] = True
+        else:
+            logger.info("accelerate is not installed; weights are randomly initialised before loading")
+        if os.path.exists(os.path.join(model_path, SAFETENSORS_FILE)):
+            options["use_safetensors"] = True
+        elif os.path.isdir(model_path):
+            logger.info("No model.safetensors found; save the model with safe_serialization=True for faster loading")
+        return options
+
+    def _load_onnx_session(self, model_path, num_threads=None):
+        """Open an ONNX Runtime session for the exported graph in model_path"""
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("The onnx backend requires onnxruntime (pip install onnxruntime)")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_path, ONNX_MODEL_FILE),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self._onnx_inputs = [node.name for node in self.session.get_inputs()]
+
+    def after_fork(self, num_threads):
+        """
+        Prepare a forked worker process for inference
+        PyTorch weights loaded before the fork stay shared copy-on-write; only the
+        intra-op thread count is set. ONNX Runtime thread pools do not survive a
+        fork, so the ONNX session is reopened in the worker.
+        """
+        torch.set_num_threads(num_threads)
+        if self.backend == "onnx":
+            self._load_onnx_session(self.model_path, num_threads)
+
+    def _forward(self, inputs):
+        """Run tokenized inputs through the active backend and return probabilities as numpy"""
+        metrics.BATCH_SIZE.observe(len(inputs["input_ids"]))
+        with metrics.span("forward"):
+            return self._run_backend(inputs)
+
+    def _run_backend(self, inputs):
+        """Backend-specific forward pass for _forward"""
+        if self.backend == "onnx":
+            feeds = {name: np.asarray(inputs[name], dtype=np.int64) for name in self._onnx_inputs}
+            logits = self.session.run(None, feeds)[0]
+            exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+            return exp / exp.sum(axis=-1, keepdims=True)
+
+        with torch.no_grad():
+            outputs = self.model(**inputs.to(self.device))
+            probabilities = torch.nn.functional.softmax(outputs.logits, dim=-1)
+            return probabilities.cpu().numpy()
+
+    @property
+    def _tensor_type(self):
+        """Tensor type the tokenizer should return for the active backend"""
+        return "np" if self.backend == "onnx" else "pt"
+
     def preprocess_text(self, text):
         """Preprocess the input text"""
-        text = str(text)  # Ensure text is string
-        text = re.sub(r"<.*?>", "", text)  # Remove HTML tags
-        text = re.sub(r'\s+', ' ', text)  # Normalize whitespace
-        text = re.sub(r'([!?.]){2,}', r'\1', text)  # Normalize repeated punctuation
-        text = re.sub(r':\)|:-\)', ' positive ', text)
-        text = re.sub(r':\(|:-\(', ' negative ', text)
-        text = re.sub(r"n't", " not", text)
-        return text.strip()
+        return preprocess_text(text)
+
+    def _run_cascade(self, processed):
+        """
+        Score preprocessed texts with the cheap first-stage model
+        Returns its probabilities where it is at least cascade_threshold confident,
+        None where the text has to go on to BERT
+        """
+        with metrics.span("cascade"):
+            probabilities = self.cascade.predict_proba(processed)
+        results = [probs if probs.max() >= self.cascade_threshold else None for probs in probabilities]
+
+        handled = sum(probs is not None for probs in results)
+        with self._cascade_lock:
+            self.cascade_counts["fast"] += handled
+            self.cascade_counts["bert"] += len(results) - handled
+        return results
+
+    def cascade_stats(self):
+        """Return the fraction of scored texts handled by each cascade stage"""
+        with self._cascade_lock:
+            total = self.cascade_counts["fast"] + self.cascade_counts["bert"]
+            return {
+                "enabled": self.cascade is not None,
+                "cascade_threshold": self.cascade_threshold,
+                "fast_stage": self.cascade_counts["fast"],
+                "bert_stage": self.cascade_counts["bert"],
+                "fast_fraction": self.cascade_counts["fast"] / total if total else 0.0
+            }
+
+    def _score(self, probabilities, confidence_threshold):
+        """Turn a probability distribution into a (rating, confidence, probabilities) tuple"""
+        rating = probabilities.argmax() + 1  # Convert to 1-5 scale
+        confidence = probabilities.max()
+
+        if confidence < confidence_threshold:
+            return None, confidence, probabilities
+
+        return rating, confidence, probabilities
 
     def predict(self, text, confidence_threshold=0.6):
         """
@@ -43,68 +212,259 @@ class SentimentAnalyzer:
         - probabilities: raw probability distribution
         """
         text = self.preprocess_text(text)
-        
+
+        if self.cache is not None:
+            cached = self.cache.get(text)
+            if cached is not None:
+                return self._score(cached, confidence_threshold)
+
         try:
-            inputs = self.tokenizer(
-                text,
-                return_tensors="pt",
-                truncation=True,
-                padding=True,
-                max_length=512
-            ).to(self.device)
-            
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                probabilities = torch.nn.functional.softmax(outputs.logits, dim=-1)
-                probabilities = probabilities.cpu().numpy()[0]
-                
-                rating = probabilities.argmax() + 1  # Convert to 1-5 scale
-                confidence = probabilities.max()
-                
-                if confidence < confidence_threshold:
-                    return None, confidence, probabilities
-                    
-                return rating, confidence, probabilities
-                
+            # Same cascade, chunking and long-text handling as predict_batch.
+            return self.predict_encoded(self._encode_processed([text]), confidence_threshold=confidence_threshold)[0]
+
         except Exception as e:
             logger.error(f"Error in prediction: {str(e)}")
+            metrics.ERRORS.inc(stage="inference")
             return None, 0.0, None
 
-    def predict_batch(self, texts, batch_size=32):
+    def cached_predictions(self, texts, confidence_threshold=0.6):
+        """
+        Look texts up in the prediction cache without running the model
+        Returns a (rating, confidence, probabilities) tuple per text, or None on a miss
+        """
+        if self.cache is None:
+            return [None] * len(texts)
+
+        probabilities = self.cache.get_many([self.preprocess_text(text) for text in texts])
+        return [self._score(probs, confidence_threshold) if probs is not None else None
+                for probs in probabilities]
+
+    def token_lengths(self, texts):
+        """Return the padded tokens each text runs through the model: its chunks, each padded to the longest"""
+        processed = [self.preprocess_text(text) for text in texts]
+        return [chunks * longest for chunks, longest in
+                self.encoded_shapes([(text, None, features) for text, features in
+                                     zip(processed, self._prepare_features(processed))])]
+
+    def encoded_shapes(self, encoded):
+        """
+        Return (model inputs, longest input in tokens) for each encode() result
+        Sliding windows give a long text several inputs; (0, 0) where no forward pass is needed.
+        """
+        return [(len(features), max(len(feature["input_ids"]) for feature in features))
+                if features is not None else (0, 0)
+                for _, _, features in encoded]
+
+    def _clip(self, text):
+        """
+        Cheap character-level pre-truncation, so very long reviews are never tokenized in full
+        Keeps enough characters for every token the long_text strategy can use.
+        """
+        if self.long_text == "sliding":
+            body = MAX_LENGTH - self.tokenizer.num_special_tokens_to_add()
+            max_chars = (body + (self.max_chunks - 1) * (body // 2)) * MAX_CHARS_PER_TOKEN
+        else:
+            max_chars = MAX_LENGTH * MAX_CHARS_PER_TOKEN
+        if len(text) <= max_chars:
+            return text
+        if self.long_text == "head_tail":
+            head_chars = HEAD_TOKENS * MAX_CHARS_PER_TOKEN
+            return text[:head_chars] + " " + text[len(text) - (max_chars - head_chars):]
+        return text[:max_chars]
+
+    def _chunk(self, ids, body):
+        """Split one text's token ids (without special tokens) into model inputs of at most body tokens"""
+        if len(ids) <= body:
+            return [ids]
+        if self.long_text == "head_tail":
+            return [ids[:HEAD_TOKENS] + ids[len(ids) - (body - HEAD_TOKENS):]]
+        if self.long_text == "sliding":
+            stride = body // 2
+            chunks = []
+            for start in range(0, len(ids), stride):
+                chunks.append(ids[start:start + body])
+                if start + body >= len(ids) or len(chunks) == self.max_chunks:
+                    break
+            return chunks
+        return [ids[:body]]
+
+    def _encode_chunks(self, processed):
+        """Tokenize preprocessed texts into per-text lists of chunk token ids (without special tokens)"""
+        body = MAX_LENGTH - self.tokenizer.num_special_tokens_to_add()
+        with metrics.span("tokenize"):
+            encodings = self.tokenizer(
+                [self._clip(text) for text in processed],
+                add_special_tokens=False,
+                truncation=False,
+                verbose=False
+            )
+        return [self._chunk(ids, body) for ids in encodings["input_ids"]]
+
+    def _prepare_features(self, processed):
+        """Tokenize preprocessed texts into per-text lists of model inputs (one per chunk, with special tokens)"""
+        return [[self.tokenizer.prepare_for_model(chunk, add_special_tokens=True, verbose=False) for chunk in chunks]
+                for chunks in self._encode_chunks(processed)]
+
+    def encode(self, texts):
+        """
+        Preprocess and tokenize texts ahead of predict_encoded
+        Texts the cascade is confident about are answered here and never tokenized.
+        Returns a (processed text, probabilities, features) tuple per text:
+        probabilities is set for cascade answers, features (one model input per
+        chunk) for texts that still need a forward pass; both are None where
+        tokenization failed.
+        """
+        with metrics.span("preprocess"):
+            processed = [self.preprocess_text(text) for text in texts]
+        return self._encode_processed(processed)
+
+    def _encode_processed(self, processed):
+        """encode() for already preprocessed texts"""
+        # Confident first-stage predictions skip BERT; they are cheap, so not cached.
+        if self.cascade is not None and processed:
+            probabilities = self._run_cascade(processed)
+        else:
+            probabilities = [None] * len(processed)
+
+        features = [None] * len(processed)
+        missing = [i for i, probs in enumerate(probabilities) if probs is None]
+        if missing:
+            try:
+                # Tokenize once without padding; padding is applied per bucket.
+                for i, text_features in zip(missing, self._prepare_features([processed[i] for i in missing])):
+                    features[i] = text_features
+            except Exception as e:
+                logger.error(f"Error in batch tokenization: {str(e)}")
+                metrics.ERRORS.inc(stage="tokenize")
+                features = [None] * len(processed)
+
+        return list(zip(processed, probabilities, features))
+
+    @staticmethod
+    def make_buckets(lengths, batch_size=32, max_batch_tokens=None):
+        """
+        Group indices into buckets of similar token length
+        Each bucket holds at most batch_size items and, if max_batch_tokens is
+        set, at most max_batch_tokens padded tokens (bucket size * longest item).
+        """
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+        buckets = []
+        bucket = []
+
+        for index in order:
+            # Lengths are ascending, so the current item is the bucket's longest.
+            padded_tokens = (len(bucket) + 1) * lengths[index]
+            if bucket and (len(bucket) >= batch_size or
+                           (max_batch_tokens and padded_tokens > max_batch_tokens)):
+                buckets.append(bucket)
+                bucket = []
+            bucket.append(index)
+
+        if bucket:
+            buckets.append(bucket)
+        return buckets
+
+    def predict_batch(self, texts, batch_size=32, confidence_threshold=0.6, max_batch_tokens=None,
+                      read_cache=True):
         """
         Predict sentiment for a batch of texts
-        Returns list of (rating, confidence, probabilities) tuples
+        Texts are sorted by token length and split into buckets of similar
+        length, so each bucket is only padded to its own longest item.
+        Set read_cache=False when the caller has already looked texts up in the
+        cache; results are still written to it.
+        Returns list of (rating, confidence, probabilities) tuples in input order,
+        with the same confidence_threshold semantics as predict
         """
-        results = []
-        
-        try:
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i:i + batch_size]
-                processed_batch = [self.preprocess_text(text) for text in batch]
-                
-                inputs = self.tokenizer(
-                    processed_batch,
-                    return_tensors="pt",
-                    truncation=True,
-                    padding=True,
-                    max_length=512
-                ).to(self.device)
-                
-                with torch.no_grad():
-                    outputs = self.model(**inputs)
-                    probabilities = torch.nn.functional.softmax(outputs.logits, dim=-1)
-                    probabilities = probabilities.cpu().numpy()
-                    
-                    for probs in probabilities:
-                        rating = probs.argmax() + 1  # Convert to 1-5 scale
-                        confidence = probs.max()
-                        results.append((rating, confidence, probs))
-                        
-        except Exception as e:
-            logger.error(f"Error in batch prediction: {str(e)}")
-            
+        results = [(None, 0.0, None)] * len(texts)
+        if not texts:
+            return results
+
+        with metrics.span("preprocess"):
+            processed = [self.preprocess_text(text) for text in texts]
+
+        # Only cache misses go through the models.
+        if self.cache is not None and read_cache:
+            for i, probs in enumerate(self.cache.get_many(processed)):
+                if probs is not None:
+                    results[i] = self._score(probs, confidence_threshold)
+                    processed[i] = None
+
+        missing = [i for i, text in enumerate(processed) if text is not None]
+        if missing:
+            encoded = self._encode_processed([processed[i] for i in missing])
+            for i, result in zip(missing, self.predict_encoded(encoded, batch_size, confidence_threshold,
+                                                               max_batch_tokens)):
+                results[i] = result
+
         return results
 
+    def predict_encoded(self, encoded, batch_size=32, confidence_threshold=0.6, max_batch_tokens=None):
+        """
+        Score encode() results, running only texts that still need it through the model
+        Forward-pass results are written to the cache. Returns list of
+        (rating, confidence, probabilities) tuples in input order, with the same
+        confidence_threshold semantics as predict
+        """
+        probabilities = [probs for _, probs, _ in encoded]
+        pending = [i for i, (_, probs, features) in enumerate(encoded) if probs is None and features is not None]
+
+        if pending:
+            scored = self._forward_features([encoded[i][2] for i in pending], batch_size, max_batch_tokens)
+            for i, probs in zip(pending, scored):
+                probabilities[i] = probs
+
+            if self.cache is not None:
+                self.cache.put_many([(encoded[i][0], probabilities[i]) for i in pending
+                                     if probabilities[i] is not None])
+
+        return [self._score(probs, confidence_threshold) if probs is not None else (None, 0.0, None)
+                for probs in probabilities]
+
+    def _forward_features(self, text_features, batch_size=32, max_batch_tokens=None):
+        """
+        Run tokenized texts (lists of chunk model inputs) through the model in length-bucketed batches
+        Returns a probability distribution per text, or None where inference failed
+        """
+        features = []
+        owners = []
+        for index, chunk_features in enumerate(text_features):
+            for feature in chunk_features:
+                features.append(feature)
+                owners.append(index)
+
+        # Chunks of long reviews share token-budgeted buckets with short reviews.
+        lengths = [len(feature["input_ids"]) for feature in features]
+        chunk_probabilities = [None] * len(features)
+
+        for bucket in self.make_buckets(lengths, batch_size, max_batch_tokens):
+            try:
+                with metrics.span("pad"):
+                    inputs = self.tokenizer.pad([features[i] for i in bucket], return_tensors=self._tensor_type)
+
+                for index, probs in zip(bucket, self._forward(inputs)):
+                    chunk_probabilities[index] = probs
+
+            except Exception as e:
+                logger.error(f"Error in batch prediction: {str(e)}")
+                metrics.ERRORS.inc(stage="inference")
+
+        # Average each text's chunk probabilities, weighted by chunk length; a failed chunk fails the text.
+        per_text = [[] for _ in text_features]
+        for owner, length, probs in zip(owners, lengths, chunk_probabilities):
+            per_text[owner].append((length, probs))
+
+        probabilities = [None] * len(text_features)
+        for index, results in enumerate(per_text):
+            if any(probs is None for _, probs in results):
+                continue
+            if len(results) == 1:
+                probabilities[index] = results[0][1]
+            else:
+                probabilities[index] = sum(length * probs for length, probs in results) / sum(
+                    length for length, _ in results)
+
+        return probabilities
+
     def get_sentiment_explanation(self, rating, confidence):
         """Provide a human-readable explanation of the sentiment"""
         sentiment_map = {
@@ -123,6 +483,92 @@ class SentimentAnalyzer:
         
         return f"Sentiment is {sentiment} ({rating} stars) with {confidence_percent} confidence"
 
+class LazySentimentAnalyzer:
+    """
+    Stand-in for a SentimentAnalyzer that is built on first use or in the background.
+
+    factory() builds the real analyzer. Attribute access blocks until it is
+    loaded, so the stand-in can be passed anywhere a SentimentAnalyzer is
+    expected (e.g. InferenceScheduler) without loading the model up front.
+    A failed load is re-raised for retry_interval seconds, then retried on the
+    next use or start(), so a transient failure doesn't leave the process
+    permanently unready.
+    """
+
+    def __init__(self, factory, retry_interval=30):
+        self._factory = factory
+        self._analyzer = None
+        self._error = None
+        self._failed_at = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self.retry_interval = retry_interval
+        self.load_seconds = None
+
+    def _should_load(self):
+        """Whether a load may start now: never tried, or the last failure is old enough to retry"""
+        if self._analyzer is not None:
+            return False
+        return self._error is None or time.monotonic() - self._failed_at >= self.retry_interval
+
+    def load(self):
+        """Build the analyzer if needed and return it; re-raises a recent failed load"""
+        if self._analyzer is not None:
+            return self._analyzer
+
+        with self._lock:
+            if self._should_load():
+                self._error = None
+                start = time.perf_counter()
+                try:
+                    self._analyzer = self._factory()
+                except Exception as e:
+                    logger.error(f"Error loading model: {str(e)}")
+                    self._error = e
+                    self._failed_at = time.monotonic()
+                    raise
+                self.load_seconds = time.perf_counter() - start
+                logger.info(f"Sentiment analyzer ready in {self.load_seconds:.2f}s")
+            if self._error is not None:
+                raise self._error
+            return self._analyzer
+
+    def start(self):
+        """Begin loading (or retrying a failed load) on a background thread; returns immediately"""
+        with self._lock:
+            if not self._should_load():
+                return
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._load_quietly, name="model-loader", daemon=True)
+                self._thread.start()
+
+    def _load_quietly(self):
+        try:
+            self.load()
+        except Exception:
+            pass  # Kept in self._error and reported by status().
+
+    @property
+    def ready(self):
+        """Whether the analyzer is loaded and can serve predictions without waiting"""
+        return self._analyzer is not None
+
+    def status(self):
+        """Return the loading state: "not_loaded", "loading", "ready" or "failed" """
+        if self._analyzer is not None:
+            return "ready"
+        if self._error is not None:
+            return "failed"
+        if self._lock.locked():
+            return "loading"
+        return "not_loaded"
+
+    def __getattr__(self, name):
+        # Only called for attributes not defined on the stand-in itself.
+        if name in ("_factory", "_analyzer", "_error", "_failed_at", "_thread", "_lock", "retry_interval"):
+            raise AttributeError(name)  # Not yet set (e.g. during unpickling).
+        return getattr(self.load(), name)
+
 def test_model():
     """Test the model with some example reviews"""
     analyzer = SentimentAnalyzer()
@@ -0,0 +1,87 @@
+from gunicorn.app.base import BaseApplication
+import torch
+import argparse
+import logging
+import gc
+import os
+import threading
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class PreloadedApplication(BaseApplication):
+    """
+    Gunicorn application that loads app.py (and the model) once in the master.
+
+    Workers are forked afterwards, so the model weights are shared copy-on-write
+    instead of each worker loading its own copy.
+    """
+
+    def __init__(self, options, torch_threads):
+        self.options = options
+        self.torch_threads = torch_threads
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+        self.cfg.set("post_fork", self.post_fork)
+
+    def load(self):
+        # Keep the master single-threaded so no intra-op thread pool exists at fork time.
+        torch.set_num_threads(1)
+        import app as app_module
+
+        # Load in the master, before forking, so workers share the weights.
+        app_module.analyzer.load()
+
+        # Move everything allocated so far out of the GC's reach; otherwise the
+        # first collection in each worker touches (and copies) those pages.
+        gc.collect()
+        gc.freeze()
+        return app_module.app
+
+    def post_fork(self, server, worker):
+        import app as app_module
+        from scrape import warm_scrapers
+
+        app_module.analyzer.after_fork(self.torch_threads)
+
+        # Prepare this worker's scraping engine before traffic arrives.
+        threading.Thread(target=warm_scrapers, name="scraper-warmup", daemon=True).start()
+        logger.info(f"Worker {worker.pid} ready with {self.torch_threads} torch threads")
+
+def main():
+    cores = os.cpu_count() or 1
+
+    parser = argparse.ArgumentParser(description="Serve the review analyzer with preforked workers")
+    parser.add_argument("--bind", default=os.getenv("BIND", "0.0.0.0:8000"))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WORKERS", max(1, cores // 4))))
+    parser.add_argument("--threads", type=int, default=int(os.getenv("WORKER_THREADS", "8")),
+                        help="HTTP threads per worker")
+    parser.add_argument("--torch-threads", type=int, default=int(os.getenv("TORCH_THREADS", "0")),
+                        help="Intra-op threads per worker (default: cores / workers)")
+    parser.add_argument("--max-inflight", type=int, default=int(os.getenv("MAX_INFLIGHT_INFERENCE", "4")),
+                        help="Max concurrent inference requests per worker")
+    parser.add_argument("--timeout", type=int, default=int(os.getenv("WORKER_TIMEOUT", "180")))
+    args = parser.parse_args()
+
+    # Split the cores between workers so they don't oversubscribe the node.
+    torch_threads = args.torch_threads or max(1, cores // args.workers)
+
+    # Read by app.py at import time in the master.
+    os.environ["MAX_INFLIGHT_INFERENCE"] = str(args.max_inflight)
+
+    options = {
+        "bind": args.bind,
+        "workers": args.workers,
+        "threads": args.threads,
+        "worker_class": "gthread",
+        "preload_app": True,
+        "timeout": args.timeout,
+    }
+    logger.info(f"Starting {args.workers} workers x {torch_threads} torch threads on {cores} cores")
+    PreloadedApplication(options, torch_threads).run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import sqlite3
+import os
+
+
+class SQLiteConnection:
+    """
+    Lazily opened SQLite connection for one process.
+
+    The database is opened in WAL mode and the schema statements are run on first
+    use. A forked worker (see serve.py) gets its own connection on first use
+    instead of sharing the parent's, which SQLite does not support.
+    """
+
+    def __init__(self, db_path, schema=()):
+        self.db_path = db_path
+        self.schema = schema
+        self._db = None
+        self._db_pid = None
+
+    def connect(self):
+        """Return this process's connection, or None when no db_path is configured"""
+        if not self.db_path or self._db_pid == os.getpid():
+            return self._db
+
+        db = sqlite3.connect(self.db_path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        for statement in self.schema:
+            db.execute(statement)
+        db.commit()
+        self._db = db
+        self._db_pid = os.getpid()
+        return db
@@ -1,3 +1,56 @@
+
+function renderSummary(summaryDiv, sentiment_summary, total_reviews, processed_reviews) {
+    summaryDiv.innerHTML = `
+        <div class="summary-stats">
+            <p>Total Reviews Analyzed: ${processed_reviews} of ${total_reviews}</p>
+            <p>Average Rating: ${sentiment_summary.average_rating.toFixed(1)} / 5</p>
+            <p>Average Confidence: ${(sentiment_summary.average_confidence * 100).toFixed(1)}%</p>
+        </div>
+
+        <div class="sentiment-breakdown">
+            <h3>Rating Distribution:</h3>
+            <p>★★★★★ Very Positive: ${sentiment_summary.very_positive}</p>
+            <p>★★★★☆ Positive: ${sentiment_summary.positive}</p>
+            <p>★★★☆☆ Neutral: ${sentiment_summary.neutral}</p>
+            <p>★★☆☆☆ Negative: ${sentiment_summary.negative}</p>
+            <p>★☆☆☆☆ Very Negative: ${sentiment_summary.very_negative}</p>
+        </div>
+    `;
+}
+
+function renderReview(review) {
+    return `
+        <li class="review-item">
+            <div class="review-text">${review.review_text}</div>
+            <div class="review-stats">
+                <span class="rating">Predicted Rating: ${review.predicted_rating}/5</span>
+                <span class="confidence">Confidence: ${(review.confidence * 100).toFixed(1)}%</span>
+            </div>
+        </li>
+    `;
+}
+
+// Read an NDJSON response body and call onEvent for each parsed line.
+async function readEvents(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop();
+        lines.filter(line => line.trim()).forEach(line => onEvent(JSON.parse(line)));
+    }
+
+    if (buffer.trim()) {
+        onEvent(JSON.parse(buffer));
+    }
+}
+
 document.getElementById("review-form").addEventListener("submit", async (event) => {
     event.preventDefault();
 
@@ -8,58 +61,53 @@ document.getElementById("review-form").addEventListener("submit", async (event)
     resultsDiv.innerHTML = "<p>Analyzing reviews... This may take a moment.</p>";
 
     try {
-        // Send POST request to the backend.
-        const response = await fetch("/analyze", {
+        // Send POST request to the streaming backend endpoint.
+        const response = await fetch("/analyze/stream", {
             method: "POST",
             headers: { "Content-Type": "application/json" },
             body: JSON.stringify({ url, num_pages: numPages }),
         });
 
-        const data = await response.json();
-
-        // Handle errors.
-        if (!response.ok || data.error) {
+        // Handle request validation errors.
+        if (!response.ok) {
+            const data = await response.json();
             throw new Error(data.error || data.message || 'An error occurred');
         }
 
-        // Extract data from the response.
-        const { sentiment_summary, analyzed_reviews, total_reviews, processed_reviews } = data;
-
-        // Create the results HTML.
-        const resultsHTML = `
+        // Create the results skeleton; it is filled in as results stream in.
+        resultsDiv.innerHTML = `
             <h2>Sentiment Analysis Results</h2>
-            <div class="summary-stats">
-                <p>Total Reviews Analyzed: ${processed_reviews} of ${total_reviews}</p>
-                <p>Average Rating: ${sentiment_summary.average_rating.toFixed(1)} / 5</p>
-                <p>Average Confidence: ${(sentiment_summary.average_confidence * 100).toFixed(1)}%</p>
-            </div>
-            
-            <div class="sentiment-breakdown">
-                <h3>Rating Distribution:</h3>
-                <p>★★★★★ Very Positive: ${sentiment_summary.very_positive}</p>
-                <p>★★★★☆ Positive: ${sentiment_summary.positive}</p>
-                <p>★★★☆☆ Neutral: ${sentiment_summary.neutral}</p>
-                <p>★★☆☆☆ Negative: ${sentiment_summary.negative}</p>
-                <p>★☆☆☆☆ Very Negative: ${sentiment_summary.very_negative}</p>
-            </div>
+            <p class="stream-status">Scraping and analyzing reviews...</p>
+            <div class="stream-summary"></div>
 
             <div class="reviews-section">
                 <h3>Analyzed Reviews:</h3>
-                <ul>
-                    ${analyzed_reviews.map(review => `
-                        <li class="review-item">
-                            <div class="review-text">${review.review_text}</div>
-                            <div class="review-stats">
-                                <span class="rating">Predicted Rating: ${review.predicted_rating}/5</span>
-                                <span class="confidence">Confidence: ${(review.confidence * 100).toFixed(1)}%</span>
-                            </div>
-                        </li>
-                    `).join('')}
-                </ul>
+                <ul class="stream-reviews"></ul>
             </div>
         `;
+        const statusP = resultsDiv.querySelector(".stream-status");
+        const summaryDiv = resultsDiv.querySelector(".stream-summary");
+        const reviewsList = resultsDiv.querySelector(".stream-reviews");
+        let streamError = null;
+
+        await readEvents(response, (data) => {
+            if (data.type === "review") {
+                reviewsList.insertAdjacentHTML("beforeend", renderReview(data));
+            } else if (data.type === "summary") {
+                statusP.textContent = `Analyzed page ${data.page}, fetching more reviews...`;
+                renderSummary(summaryDiv, data.sentiment_summary, data.total_reviews, data.processed_reviews);
+            } else if (data.type === "done") {
+                statusP.remove();
+                renderSummary(summaryDiv, data.sentiment_summary, data.total_reviews, data.processed_reviews);
+            } else if (data.type === "error") {
+                streamError = data.error || data.message || 'An error occurred';
+            }
+        });
 
-        resultsDiv.innerHTML = resultsHTML;
+        // Handle errors reported mid-stream.
+        if (streamError) {
+            throw new Error(streamError);
+        }
 
     } catch (error) {
         console.error("Error:", error);
@@ -70,4 +118,4 @@ document.getElementById("review-form").addEventListener("submit", async (event)
             </div>
         `;
     }
-});
\ No newline at end of file
+});
@@ -0,0 +1,78 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import sys
+import os
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+sys.path.insert(0, REPO_DIR)
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+# Path -> (status, extra headers, body) served by the fixture server.
+ROUTES = {
+    "/product-reviews/B000EXAMPLE": (200, {}, "review_page.html"),
+    "/product-reviews/B000NOREVIEWS": (200, {}, "no_reviews_page.html"),
+    "/errors/captcha": (200, {}, "captcha_page.html"),
+    "/errors/captcha-503": (503, {}, "captcha_page.html"),
+    "/throttled-429": (429, {"Retry-After": "5"}, None),
+    "/throttled-503": (503, {}, None),
+    "/server-error": (500, {}, None),
+    "/signin-redirect": (302, {"Location": "/ap/signin?openid.return_to=reviews"}, None),
+    "/ap/signin": (200, {}, None),
+}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        status, headers, fixture = ROUTES.get(self.path.split("?", 1)[0], (404, {}, None))
+        body = (read_fixture(fixture) if fixture else f"<html><body>HTTP {status}</body></html>").encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="session")
+def fixture_server():
+    """Base URL of a local HTTP server serving the saved HTML fixtures."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    """The Flask app module, with the tiny benchmark model and its SQLite stores under a temporary directory."""
+    from benchmark import build_tiny_model
+
+    data_dir = tmp_path_factory.mktemp("app")
+    os.environ["SENTIMENT_MODEL_PATH"] = build_tiny_model(str(data_dir / "model"))
+    os.environ["SENTIMENT_BACKEND"] = "pytorch"
+    os.environ.pop("CASCADE_MODEL_PATH", None)
+    for name in ("JOB_DB_PATH", "AGGREGATE_DB_PATH", "SCRAPE_CACHE_PATH"):
+        os.environ[name] = str(data_dir / f"{name.lower()}.sqlite3")
+
+    import app
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
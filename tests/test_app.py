@@ -0,0 +1,97 @@
+import pytest
+import time
+
+PRODUCT_URL = "https://www.amazon.com/product-reviews/B000EXAMPLE"
+
+
+@pytest.fixture
+def scraped_pages(app_module, monkeypatch):
+    """Replace scraping with a list of pages of review texts, which tests fill in; "slow" is a page that takes 0.5s."""
+    pages = []
+
+    def fake_iter_review_pages(product_url, num_pages=5, incremental=False, **kwargs):
+        for page, reviews in enumerate(pages[:num_pages], start=1):
+            if reviews == "slow":
+                time.sleep(0.5)
+                reviews = ["arrived too late"]
+            yield page, list(reviews)
+
+    monkeypatch.setattr(app_module, "iter_review_pages", fake_iter_review_pages)
+    return pages
+
+
+@pytest.mark.parametrize("body", [
+    {"url": PRODUCT_URL, "num_pages": "two"},
+    {"url": PRODUCT_URL, "num_pages": None},
+    {"url": PRODUCT_URL, "num_pages": [1]},
+    {"url": PRODUCT_URL, "deadline_ms": "soon"},
+    {"url": PRODUCT_URL, "max_reviews": 0},
+    {"url": PRODUCT_URL, "fields": 5},
+    {"url": PRODUCT_URL, "limit": "ten"},
+    [PRODUCT_URL],
+])
+def test_analyze_rejects_invalid_request(client, body):
+    response = client.post("/analyze", json=body)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_analyze_requires_url(client):
+    response = client.post("/analyze", json={"num_pages": 1})
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Product URL is required"}
+
+
+def test_summary_of_product_analyzed_without_confident_reviews(client, scraped_pages):
+    # The tiny model is never confident enough to count a prediction.
+    scraped_pages.append(["meh", "it works i guess"])
+    url = "https://www.amazon.com/product-reviews/B00LOWCONF"
+    assert client.get("/products/B00LOWCONF/summary").status_code == 404
+
+    response = client.post("/analyze", json={"url": url})
+    assert response.status_code == 200
+    assert response.get_json()["processed_reviews"] == 0
+
+    response = client.get("/products/B00LOWCONF/summary?history=1")
+    assert response.status_code == 200
+    summary = response.get_json()
+    assert summary["processed_reviews"] == 0
+    assert summary["sentiment_summary"]["average_rating"] == 0
+    assert summary["history"] == []
+
+
+@pytest.fixture
+def slow_scoring(app_module, monkeypatch):
+    """Make scoring a page take 0.3s, so a short deadline expires after the first page."""
+    score_reviews = app_module.score_reviews
+
+    def slow_score_reviews(review_texts):
+        time.sleep(0.3)
+        return score_reviews(review_texts)
+
+    monkeypatch.setattr(app_module, "score_reviews", slow_score_reviews)
+
+
+def test_deadline_before_first_page_returns_partial_result(client, scraped_pages):
+    scraped_pages.append("slow")
+    response = client.post("/analyze", json={"url": PRODUCT_URL, "deadline_ms": 100})
+
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result["partial"] is True
+    assert result["total_reviews"] == 0 and result["analyzed_reviews"] == []
+    assert result["sentiment_summary"]["estimated"] is True
+    assert result["budget"]["stopped_early"] is True
+
+
+@pytest.mark.parametrize("listing_pages, stopped_early", [(1, False), (3, True)])
+def test_stopped_early_only_when_pages_were_left(client, scraped_pages, slow_scoring, listing_pages, stopped_early):
+    scraped_pages.extend([["great sound", "stopped charging"]] * listing_pages)
+    response = client.post("/analyze", json={"url": PRODUCT_URL, "num_pages": 3, "deadline_ms": 200})
+
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result["total_reviews"] == 2
+    assert result["budget"]["scored_reviews"] < 2
+    assert result["partial"] is True
+    assert result["budget"]["stopped_early"] is stopped_early
@@ -0,0 +1,63 @@
+from benchmark import build_tiny_model
+from bulk_score import CHECKPOINT_FILE, bulk_score
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+import json
+import os
+
+REVIEWS = [
+    "great sound and the battery lasts all day",
+    "stopped charging after two weeks",
+    "fine for the price",
+    "would not buy again",
+    "love it",
+]
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    return build_tiny_model(str(tmp_path_factory.mktemp("tiny_model")))
+
+
+def score(input_path, output_dir, model_path, **kwargs):
+    return bulk_score(str(input_path), str(output_dir), model_path=model_path, chunk_size=2, batch_size=2,
+                      workers=1, threads_per_worker=1, **kwargs)
+
+
+def read_output(output_dir):
+    return pq.read_table(str(output_dir))
+
+
+def test_nullable_integer_ids(tmp_path, model_path):
+    input_path = tmp_path / "reviews.parquet"
+    ids = pa.array([10, None, 12, 13, None], type=pa.int64())
+    pq.write_table(pa.table({"review_text": REVIEWS, "review_id": ids}), str(input_path))
+
+    score(input_path, tmp_path / "out", model_path, id_column="review_id")
+
+    output = read_output(tmp_path / "out")
+    assert output.schema.field("id").type == pa.int64()
+    assert output.column("id").to_pylist() == [10, None, 12, 13, None]
+
+
+def test_row_number_ids_and_resume(tmp_path, model_path):
+    input_path = tmp_path / "reviews.csv"
+    input_path.write_text("review_text\n" + "\n".join(REVIEWS) + "\n")
+    output_dir = tmp_path / "out"
+
+    checkpoint = score(input_path, output_dir, model_path)
+    assert checkpoint["completed_chunks"] == 3 and checkpoint["rows"] == len(REVIEWS)
+    assert sorted(name for name in os.listdir(output_dir) if name.endswith(".parquet")) == [
+        "part-000000.parquet", "part-000001.parquet", "part-000002.parquet"
+    ]
+    output = read_output(output_dir)
+    assert output.column("id").to_pylist() == list(range(len(REVIEWS)))
+    assert output.column_names == ["id", "predicted_rating", "confidence"] + [f"prob_{star}" for star in range(1, 6)]
+
+    # A finished run resumes with nothing left to score; changed settings are refused.
+    assert score(input_path, output_dir, model_path)["rows"] == len(REVIEWS)
+    with open(output_dir / CHECKPOINT_FILE) as f:
+        assert json.load(f)["completed_chunks"] == 3
+    with pytest.raises(ValueError, match="confidence_threshold"):
+        score(input_path, output_dir, model_path, confidence_threshold=0.9)
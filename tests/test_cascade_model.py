@@ -0,0 +1,43 @@
+from conftest import REPO_DIR
+from cascade_model import FastSentimentClassifier, RATINGS
+import pandas as pd
+import subprocess
+import sys
+
+REVIEWS = [
+    ("Terrible, broke after one day. Total waste of money.", 1),
+    ("Bad quality and the seller never answered.", 2),
+    ("It's okay, does the job but nothing special.", 3),
+    ("Good value, works well for the price.", 4),
+    ("Excellent! Love it, would absolutely buy again.", 5),
+]
+
+
+def test_model_trained_as_script_loads_from_module(tmp_path):
+    train_path = tmp_path / "train.csv"
+    model_path = tmp_path / "fast.joblib"
+    pd.DataFrame(REVIEWS * 4, columns=["review_text", "rating"]).to_csv(train_path, index=False)
+
+    # Train through the CLI, where the class lives in __main__, then load it the way app.py does.
+    subprocess.run(
+        [sys.executable, "cascade_model.py", "train", "--train-path", str(train_path),
+         "--fast-model-path", str(model_path), "--epochs", "2"],
+        cwd=REPO_DIR, check=True
+    )
+    model = FastSentimentClassifier.load(str(model_path))
+
+    probabilities = model.predict_proba(["love it", "broke after one day"])
+    assert isinstance(model, FastSentimentClassifier)
+    assert probabilities.shape == (2, len(RATINGS))
+    assert abs(float(probabilities.sum(axis=1)[0]) - 1.0) < 1e-5
+
+
+def test_save_and_load_round_trip(tmp_path):
+    model = FastSentimentClassifier(n_features=2 ** 12)
+    texts, ratings = zip(*REVIEWS)
+    model.partial_fit(list(texts), list(ratings))
+    model.save(str(tmp_path / "fast.joblib"))
+
+    loaded = FastSentimentClassifier.load(str(tmp_path / "fast.joblib"))
+    assert loaded.n_features == 2 ** 12
+    assert (loaded.predict_proba(list(texts)) == model.predict_proba(list(texts))).all()
@@ -0,0 +1,55 @@
+from conftest import read_fixture
+from http_scrape import BlockedPageError, HttpReviewScraper
+import requests
+import pytest
+import scrape
+
+EXPECTED_REVIEWS = [
+    "Battery lasts all day and the case charges fast. Would buy again!",
+    "Left earbud stopped charging after two weeks & support never replied.",
+    "It's fine. Fit is loose in smaller ears.",
+]
+
+
+@pytest.fixture
+def scraper(tmp_path):
+    return HttpReviewScraper(cookies_file=str(tmp_path / "cookies.pkl"), timeout=5)
+
+
+def test_parse_reviews_extracts_review_bodies():
+    assert HttpReviewScraper.parse_reviews(read_fixture("review_page.html")) == EXPECTED_REVIEWS
+
+
+def test_parse_reviews_without_reviews():
+    assert HttpReviewScraper.parse_reviews(read_fixture("no_reviews_page.html")) == []
+
+
+def test_fetch_page(scraper, fixture_server):
+    assert scraper.fetch_page(f"{fixture_server}/product-reviews/B000EXAMPLE?pageNumber=1") == EXPECTED_REVIEWS
+    assert scraper.fetch_page(f"{fixture_server}/product-reviews/B000NOREVIEWS?pageNumber=1") == []
+
+
+@pytest.mark.parametrize("path", ["/errors/captcha", "/errors/captcha-503", "/signin-redirect",
+                                  "/throttled-429", "/throttled-503"])
+def test_fetch_page_blocked(scraper, fixture_server, path):
+    with pytest.raises(BlockedPageError):
+        scraper.fetch_page(fixture_server + path)
+
+
+def test_fetch_page_server_error_is_not_blocked(scraper, fixture_server):
+    with pytest.raises(requests.HTTPError):
+        scraper.fetch_page(f"{fixture_server}/server-error")
+
+
+def test_scrape_page_falls_back_to_browser_when_throttled(scraper, fixture_server, monkeypatch):
+    browser_urls = []
+    monkeypatch.setattr(scrape, "get_http_scraper", lambda cookies_file: scraper)
+    monkeypatch.setattr(scrape, "get_driver_pool", lambda cookies_file: None)
+    monkeypatch.setattr(scrape, "scrape_page_with_driver",
+                        lambda pool, url, timeout: browser_urls.append(url) or ["from browser"])
+
+    assert scrape.scrape_page(f"{fixture_server}/throttled-429", 1) == ["from browser"]
+    assert browser_urls == [f"{fixture_server}/throttled-429"]
+
+    assert scrape.scrape_page(f"{fixture_server}/product-reviews/B000EXAMPLE", 1) == EXPECTED_REVIEWS
+    assert len(browser_urls) == 1
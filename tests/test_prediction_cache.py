@@ -0,0 +1,33 @@
+from prediction_cache import PredictionCache
+import numpy as np
+
+
+def make_cache(tmp_path, max_memory_bytes):
+    return PredictionCache(model_path=str(tmp_path), db_path=str(tmp_path / "predictions.sqlite3"),
+                           max_memory_bytes=max_memory_bytes)
+
+
+def test_memory_tier_is_bounded_by_bytes(tmp_path):
+    cache = make_cache(tmp_path, max_memory_bytes=10_000)
+    batch = np.random.default_rng(0).random((100, 5), dtype=np.float32)
+    cache.put_many([(f"review {i}", batch[i]) for i in range(100)])
+
+    stats = cache.stats()
+    assert 0 < stats["memory_bytes"] <= 10_000
+    assert 0 < stats["memory_entries"] < 100
+
+    # Evicted entries are still served from SQLite.
+    assert np.allclose(cache.get("review 0"), batch[0])
+    assert cache.stats()["disk_hits"] == 1
+    assert np.allclose(cache.get("review 99"), batch[99])
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_replacing_an_entry_keeps_byte_count(tmp_path):
+    cache = make_cache(tmp_path, max_memory_bytes=2 ** 20)
+    cache.put("review", np.full(5, 0.2, dtype=np.float32))
+    size = cache.stats()["memory_bytes"]
+
+    cache.put("review", np.array([0.1, 0.1, 0.1, 0.1, 0.6], dtype=np.float32))
+    assert cache.stats()["memory_bytes"] == size
+    assert cache.get("review")[4] == np.float32(0.6)
@@ -0,0 +1,61 @@
+from scrape_cache import ScrapeCache, filter_params, product_key
+from urllib.parse import parse_qs, urlsplit
+import pytest
+import scrape
+
+PRODUCT_URL = "https://www.amazon.com/product-reviews/B000EXAMPLE?ie=UTF8&filterByStar={stars}&pageNumber=1"
+
+# Listing pages per star filter, newest first.
+LISTINGS = {
+    "all_stars": [["Great sound", "Broke in a week"], ["Decent for the price", "Stopped charging"]],
+    "one_star": [["Cracked case on arrival", "Broke in a week"], ["Stopped charging"]],
+}
+
+
+@pytest.fixture
+def scraped(monkeypatch, tmp_path):
+    """Serve LISTINGS instead of Amazon and record which pages were fetched."""
+    cache = ScrapeCache(db_path=str(tmp_path / "scrape_cache.sqlite3"), ttl=0)
+    fetched = []
+
+    def fake_scrape_page(product_url, page, *args):
+        stars = parse_qs(urlsplit(product_url).query)["filterByStar"][0]
+        fetched.append((stars, page))
+        pages = LISTINGS[stars]
+        return list(pages[page - 1]) if page <= len(pages) else []
+
+    monkeypatch.setattr(scrape, "get_scrape_cache", lambda: cache)
+    monkeypatch.setattr(scrape, "scrape_page", fake_scrape_page)
+    return fetched
+
+
+def analyze(stars, incremental=True):
+    url = PRODUCT_URL.format(stars=stars)
+    return list(scrape.iter_review_pages(url, num_pages=2, incremental=incremental))
+
+
+def test_filter_params_ignore_sort_order():
+    _, params = product_key(PRODUCT_URL.format(stars="one_star") + "&sortBy=recent")
+    assert filter_params(params) == "filterByStar=one_star"
+
+
+def test_incremental_runs_with_different_filters(scraped):
+    assert analyze("all_stars") == [(1, LISTINGS["all_stars"][0]), (2, LISTINGS["all_stars"][1])]
+
+    # "Broke in a week" was seen unfiltered, not in the one-star listing, so the
+    # run keeps scraping and nothing is filled in from unfiltered reviews.
+    assert analyze("one_star") == [(1, LISTINGS["one_star"][0]), (2, LISTINGS["one_star"][1])]
+    assert scraped == [("all_stars", 1), ("all_stars", 2), ("one_star", 1), ("one_star", 2)]
+
+    # A repeat of the filtered run stops at page 1 and fills in only one-star reviews.
+    scraped.clear()
+    assert analyze("one_star") == [(1, LISTINGS["one_star"][0]), (2, ["Stopped charging"])]
+    assert scraped == [("one_star", 1)]
+
+
+def test_incremental_run_uses_reviews_from_other_sort_order(scraped):
+    analyze("one_star", incremental=False)
+    scraped.clear()
+
+    assert analyze("one_star") == [(1, LISTINGS["one_star"][0]), (2, ["Stopped charging"])]
+    assert scraped == [("one_star", 1)]
@@ -0,0 +1,31 @@
+from sqlite_store import SQLiteConnection
+import os
+
+SCHEMA = ("CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY, name TEXT NOT NULL)",)
+
+
+def test_connect_creates_schema_once_per_process(tmp_path):
+    store = SQLiteConnection(str(tmp_path / "store.sqlite3"), SCHEMA)
+    db = store.connect()
+    db.execute("INSERT INTO items VALUES (1, 'first')")
+    db.commit()
+
+    assert store.connect() is db
+    assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_forked_process_gets_its_own_connection(tmp_path, monkeypatch):
+    store = SQLiteConnection(str(tmp_path / "store.sqlite3"), SCHEMA)
+    parent_db = store.connect()
+    parent_db.execute("INSERT INTO items VALUES (1, 'first')")
+    parent_db.commit()
+
+    parent_pid = os.getpid()
+    monkeypatch.setattr(os, "getpid", lambda: parent_pid + 1)
+    child_db = store.connect()
+    assert child_db is not parent_db
+    assert child_db.execute("SELECT name FROM items").fetchall() == [("first",)]
+
+
+def test_connect_without_path():
+    assert SQLiteConnection(None, SCHEMA).connect() is None